@@ -8,7 +8,7 @@ from autogen_ext.models.openai import OpenAIChatCompletionClient
 from autogen_core.models import ModelInfo
 
 model_client = OpenAIChatCompletionClient(
-    base_url="https://api.thesys.dev/v1/embed",
+    base_url=os.getenv("THESYS_BASE_URL", "https://api.thesys.dev/v1/embed"),
     api_key=os.getenv("THESYS_API_KEY"),
     model="c1/anthropic/claude-sonnet-4/v-20250815",
     model_info=ModelInfo(
@@ -0,0 +1,101 @@
+"""
+Regression checks for the chat backends' admission controllers (admission.py).
+
+Drives each AdmissionController directly, without a server, and exits
+non-zero if a scenario misbehaves:
+
+- a queued turn for a busy thread must not hold up turns for idle threads
+- turns for the same thread are still admitted one at a time, in order
+
+    python admission_check.py                       # both backends
+    python admission_check.py --backend langgraph
+
+The ADK backend's admission.py reads its settings from config.py, so run it
+with python-dotenv installed.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import sys
+from typing import Callable, List
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BACKENDS = {
+    "langgraph": os.path.join(ROOT, "langgraph-with-c1-python", "backend"),
+    "adk": os.path.join(ROOT, "google-adk", "backend"),
+}
+
+
+def load_admission(backend_dir: str):
+    """Imports a backend's admission.py under a unique name, so both can be loaded side by side."""
+    sys.path.insert(0, backend_dir)
+    try:
+        name = f"admission_{os.path.basename(os.path.dirname(backend_dir))}"
+        spec = importlib.util.spec_from_file_location(name, os.path.join(backend_dir, "admission.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.path.remove(backend_dir)
+
+
+async def idle_thread_not_blocked(admission) -> None:
+    controller = admission.AdmissionController(max_concurrent=64, max_per_thread=1, queue_timeout=1.0)
+    running = await controller.acquire("a")
+    queued = asyncio.create_task(controller.acquire("a"))
+    await asyncio.sleep(0)
+    assert controller.stats()["queued"] == 1, "second turn for thread a should be queued"
+
+    # Thread b is idle and there are free slots: it must be admitted right away
+    other = await asyncio.wait_for(controller.acquire("b"), timeout=0.5)
+    assert controller.in_flight == 2, f"expected 2 turns in flight, got {controller.in_flight}"
+
+    await running.release()
+    second = await asyncio.wait_for(queued, timeout=0.5)
+    await second.release()
+    await other.release()
+    assert controller.in_flight == 0, f"slots leaked: {controller.in_flight} in flight"
+
+
+async def same_thread_in_order(admission) -> None:
+    controller = admission.AdmissionController(max_concurrent=64, max_per_thread=1, queue_timeout=1.0)
+    order: List[int] = []
+
+    async def turn(index: int):
+        ticket = await controller.acquire("a")
+        order.append(index)
+        await asyncio.sleep(0.01)
+        await ticket.release()
+
+    await asyncio.gather(*(turn(i) for i in range(5)))
+    assert order == list(range(5)), f"turns for one thread ran out of order: {order}"
+    assert controller.in_flight == 0, f"slots leaked: {controller.in_flight} in flight"
+
+
+CHECKS: List[Callable] = [idle_thread_not_blocked, same_thread_in_order]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), action="append", help="Backend to check (default: all)")
+    args = parser.parse_args()
+
+    failures = []
+    for backend in args.backend or sorted(BACKENDS):
+        admission = load_admission(BACKENDS[backend])
+        for check in CHECKS:
+            try:
+                asyncio.run(check(admission))
+                print(f"ok    {backend}: {check.__name__}")
+            except (AssertionError, asyncio.TimeoutError, admission.AdmissionRejected) as e:
+                failures.append(f"{backend}: {check.__name__}")
+                print(f"FAIL  {backend}: {check.__name__}: {e!r}")
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Import-time budget for a backend's entry module, using `python -X importtime`.
+
+Imports the module in `--runs` fresh interpreters (after one untimed run that
+writes the bytecode cache), reports the median cumulative import time and the
+packages that account for most of it, and exits non-zero when the median is
+over `--budget-ms` or a `--forbid` module was imported at startup.
+
+    python import_time.py                                   # langgraph backend, main.py
+    python import_time.py --budget-ms 1500 --json import_time.json
+    python import_time.py --backend ../google-adk/backend --module main --forbid ""
+
+Run it with the backend's own Python environment. The module is only imported,
+so no server is started and no API key is needed.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+DEFAULT_BACKEND = os.path.join(os.path.dirname(__file__), "..", "langgraph-with-c1-python", "backend")
+
+
+def measure(backend: str, module: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """Imports `module` once; returns its cumulative import time in ms, self time per top-level package and all imported modules."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    total_us = None
+    per_package: Dict[str, float] = defaultdict(float)
+    modules = []
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | name", nested imports indented under their parent
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        modules.append(name)
+        per_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == module:
+            total_us = int(cumulative_us)
+    if total_us is None:
+        raise RuntimeError(f"no import time reported for {module}")
+    return total_us / 1000, per_package, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, help="Backend directory to import from")
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5, help="Timed imports, each in a fresh interpreter")
+    parser.add_argument("--budget-ms", type=float, default=2000.0, help="Exit non-zero if the median import time exceeds this")
+    parser.add_argument(
+        "--forbid",
+        default="langchain_openai,openai",
+        help="Comma-separated modules that must not be imported at startup (they should load on first use)",
+    )
+    parser.add_argument("--top", type=int, default=10, help="Number of packages to list")
+    parser.add_argument("--json", dest="json_path", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    backend = os.path.abspath(args.backend)
+    # Untimed: the first import compiles and caches bytecode
+    measure(backend, args.module)
+    totals, packages, modules = [], defaultdict(list), set()
+    for _ in range(args.runs):
+        total, per_package, imported = measure(backend, args.module)
+        totals.append(total)
+        for package, ms in per_package.items():
+            packages[package].append(ms)
+        modules.update(imported)
+
+    median_ms = statistics.median(totals)
+    heaviest = sorted(((statistics.median(ms), package) for package, ms in packages.items()), reverse=True)
+    forbidden = [name for name in filter(None, args.forbid.split(",")) if name in modules]
+    report = {
+        "module": args.module,
+        "backend": backend,
+        "runs": args.runs,
+        "import_time_median_ms": round(median_ms, 1),
+        "import_time_min_ms": round(min(totals), 1),
+        "import_time_max_ms": round(max(totals), 1),
+        "budget_ms": args.budget_ms,
+        "modules_imported": len(modules),
+        "heaviest_packages_ms": {package: round(ms, 1) for ms, package in heaviest[:args.top]},
+        "forbidden_imported": forbidden,
+    }
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.1f}ms exceeds {args.budget_ms}ms")
+    if forbidden:
+        failures.append(f"imported at startup: {', '.join(forbidden)}")
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Load test for the Python chat backends, meant to run against mock_thesys.py.
+
+Opens `--concurrency` concurrent sessions, sends `--requests` chat turns in
+total and reports p50/p99 time to first token, end-to-end latency, tokens/sec
+and the server's memory growth per concurrent session.
+
+    python loadtest.py langgraph --url http://localhost:8000 --concurrency 50 --requests 500 --pid <server pid>
+    python loadtest.py adk --url http://localhost:8000
+    python loadtest.py langserve --url http://localhost:4001
+    python loadtest.py thesysllm   # in-process ThesysLLM (needs crewai_genui installed)
+
+Tokens are counted as whitespace-separated words, which matches what the mock server emits.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+PROMPT = "What is the weather in Paris?"
+
+
+@dataclass
+class Sample:
+    ttft: Optional[float] = None
+    latency: float = 0.0
+    tokens: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class Report:
+    target: str
+    concurrency: int
+    requests: int
+    errors: int
+    wall_time: float
+    ttft_p50_ms: Optional[float]
+    ttft_p99_ms: Optional[float]
+    latency_p50_ms: Optional[float]
+    latency_p99_ms: Optional[float]
+    tokens_per_second: float
+    stream_tokens_per_second_p50: Optional[float]
+    rss_baseline_mb: Optional[float] = None
+    rss_peak_mb: Optional[float] = None
+    memory_per_session_kb: Optional[float] = None
+    error_samples: List[str] = field(default_factory=list)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of `pid` (and its children when psutil is installed), in MB."""
+    try:
+        import psutil
+    except ImportError:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+        return None
+    try:
+        process = psutil.Process(pid)
+        processes = [process] + process.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+    except psutil.Error:
+        return None
+
+
+# --- Targets: each yields response text chunks for one chat turn --- #
+
+async def langgraph_turn(client: httpx.AsyncClient, url: str, session: str) -> AsyncIterator[str]:
+    body = {
+        "prompt": {"role": "user", "content": PROMPT, "id": str(uuid.uuid4())},
+        "threadId": session,
+        "responseId": str(uuid.uuid4()),
+    }
+    async with client.stream("POST", f"{url}/chat", json=body) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_text():
+            yield chunk
+
+
+async def adk_turn(client: httpx.AsyncClient, url: str, session: str) -> AsyncIterator[str]:
+    body = {"prompt": {"role": "user", "content": PROMPT}, "threadId": session}
+    async with client.stream("POST", f"{url}/api/chat", json=body) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_text():
+            yield chunk
+
+
+async def langserve_turn(client: httpx.AsyncClient, url: str, session: str) -> AsyncIterator[str]:
+    body = {"input": {"query": "How many tracks are in the database?", "c1Response": ""}}
+    async with client.stream("POST", f"{url}/chain/stream", json=body) as response:
+        response.raise_for_status()
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:") and event == "data":
+                chunk = json.loads(line[len("data:"):])
+                if isinstance(chunk, str) and chunk:
+                    yield chunk
+
+
+async def thesysllm_turn(client: httpx.AsyncClient, url: str, session: str) -> AsyncIterator[str]:
+    from crewai_genui.thesys_llm import ThesysLLM
+
+    llm = ThesysLLM()
+    async for delta in llm.astream_call([{"role": "user", "content": PROMPT}]):
+        yield delta
+
+
+TARGETS: Dict[str, Callable[[httpx.AsyncClient, str, str], AsyncIterator[str]]] = {
+    "langgraph": langgraph_turn,
+    "adk": adk_turn,
+    "langserve": langserve_turn,
+    "thesysllm": thesysllm_turn,
+}
+
+
+async def run_turn(turn: Callable, client: httpx.AsyncClient, url: str, session: str) -> Sample:
+    sample = Sample()
+    started = time.perf_counter()
+    text = []
+    try:
+        async for chunk in turn(client, url, session):
+            if sample.ttft is None and chunk.strip():
+                sample.ttft = time.perf_counter() - started
+            text.append(chunk)
+    except Exception as e:
+        sample.error = repr(e)
+    sample.latency = time.perf_counter() - started
+    sample.tokens = len("".join(text).split())
+    return sample
+
+
+async def run_load(target: str, url: str, concurrency: int, requests: int, pid: Optional[int]) -> Report:
+    turn = TARGETS[target]
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+    samples: List[Sample] = []
+    baseline = read_rss_mb(pid) if pid else None
+    peak = baseline
+
+    async def session_worker(client: httpx.AsyncClient):
+        # Each worker is one session (thread) that sends its turns back to back
+        session = str(uuid.uuid4())
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            samples.append(await run_turn(turn, client, url, session))
+
+    async def sample_memory():
+        nonlocal peak
+        while True:
+            rss = read_rss_mb(pid)
+            if rss is not None:
+                peak = max(peak or rss, rss)
+            await asyncio.sleep(0.2)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(300.0), limits=limits) as client:
+        memory_task = asyncio.create_task(sample_memory()) if pid else None
+        started = time.perf_counter()
+        await asyncio.gather(*(session_worker(client) for _ in range(concurrency)))
+        wall_time = time.perf_counter() - started
+        if memory_task:
+            memory_task.cancel()
+
+    ok = [s for s in samples if s.error is None]
+    ttfts = [s.ttft for s in ok if s.ttft is not None]
+    latencies = [s.latency for s in ok]
+    stream_rates = [s.tokens / (s.latency - s.ttft) for s in ok if s.ttft is not None and s.latency > s.ttft]
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 1) if value is not None else None
+
+    return Report(
+        target=target,
+        concurrency=concurrency,
+        requests=len(samples),
+        errors=len(samples) - len(ok),
+        wall_time=round(wall_time, 3),
+        ttft_p50_ms=ms(percentile(ttfts, 50)),
+        ttft_p99_ms=ms(percentile(ttfts, 99)),
+        latency_p50_ms=ms(percentile(latencies, 50)),
+        latency_p99_ms=ms(percentile(latencies, 99)),
+        tokens_per_second=round(sum(s.tokens for s in ok) / wall_time, 1) if wall_time else 0.0,
+        stream_tokens_per_second_p50=round(statistics.median(stream_rates), 1) if stream_rates else None,
+        rss_baseline_mb=round(baseline, 1) if baseline is not None else None,
+        rss_peak_mb=round(peak, 1) if peak is not None else None,
+        memory_per_session_kb=round((peak - baseline) * 1024 / concurrency, 1) if baseline is not None and peak is not None else None,
+        error_samples=[s.error for s in samples if s.error][:5],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", choices=sorted(TARGETS))
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the backend under test")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent sessions")
+    parser.add_argument("--requests", type=int, default=100, help="Total chat turns")
+    parser.add_argument("--pid", type=int, help="Server process id, to report memory per session")
+    parser.add_argument("--json", dest="json_path", help="Write the report as JSON to this file")
+    parser.add_argument("--max-p99-ttft-ms", type=float, help="Exit non-zero if p99 TTFT exceeds this")
+    parser.add_argument("--max-error-rate", type=float, default=0.0, help="Exit non-zero if the error rate exceeds this")
+    args = parser.parse_args()
+
+    if args.target == "thesysllm":
+        # Make the in-process target importable from a checkout
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "crewai_genui", "src"))
+
+    run = run_load(args.target, args.url.rstrip("/"), args.concurrency, args.requests, args.pid)
+    if args.target == "thesysllm":
+        from crewai_genui.http_client import run_closing_client
+
+        # Closes the ThesysLLM async connection pool along with this event loop
+        run = run_closing_client(run)
+    report = asyncio.run(run)
+    print(json.dumps(asdict(report), indent=2))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(asdict(report), f, indent=2)
+
+    failures = []
+    if args.max_p99_ttft_ms is not None and (report.ttft_p99_ms is None or report.ttft_p99_ms > args.max_p99_ttft_ms):
+        failures.append(f"p99 TTFT {report.ttft_p99_ms}ms exceeds {args.max_p99_ttft_ms}ms")
+    if report.requests and report.errors / report.requests > args.max_error_rate:
+        failures.append(f"error rate {report.errors}/{report.requests} exceeds {args.max_error_rate}")
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Local OpenAI-compatible stand-in for the Thesys C1 endpoint.
+
+Serves /v1/embed/chat/completions (streaming and non-streaming) with a
+configurable time to first token, token rate and response length, and can
+follow a tool-call script so agent loops exercise their tool paths.
+
+    python mock_thesys.py --port 9000 --ttft-ms 300 --tokens-per-second 80
+    export THESYS_BASE_URL=http://localhost:9000/v1/embed
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "the quick brown fox jumps over the lazy dog while streaming generative "
+    "ui components for a benchmark of chat latency and throughput"
+).split()
+
+
+class MockSettings:
+    def __init__(
+        self,
+        ttft_ms: float = 300.0,
+        tokens_per_second: float = 80.0,
+        response_tokens: int = 120,
+        script: Optional[List[Dict[str, Any]]] = None,
+    ):
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        # Each step is {"content": "..."} or {"tool_calls": [{"name": ..., "arguments": {...}}]}
+        self.script = script or []
+
+
+settings = MockSettings()
+app = FastAPI(title="Mock Thesys API")
+
+
+def _next_step(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Picks the script step for this request: one step per assistant turn since the last user message."""
+    if not settings.script:
+        return {}
+    turn = 0
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            break
+        if message.get("role") == "assistant":
+            turn += 1
+    return settings.script[turn] if turn < len(settings.script) else {}
+
+
+def _tool_calls(step: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))},
+        }
+        for call in step.get("tool_calls", [])
+    ]
+
+
+def _tokens(step: Dict[str, Any]) -> List[str]:
+    if "content" in step:
+        return [word + " " for word in step["content"].split()]
+    return [WORDS[i % len(WORDS)] + " " for i in range(settings.response_tokens)]
+
+
+def _chunk(completion_id: str, model: str, delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def _stream(completion_id: str, model: str, step: Dict[str, Any]):
+    await asyncio.sleep(settings.ttft_ms / 1000)
+    yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+    tool_calls = _tool_calls(step)
+    if tool_calls:
+        for index, call in enumerate(tool_calls):
+            yield _chunk(completion_id, model, {"tool_calls": [{"index": index, **call}]})
+        yield _chunk(completion_id, model, {}, finish_reason="tool_calls")
+    else:
+        interval = 1 / settings.tokens_per_second if settings.tokens_per_second > 0 else 0
+        for token in _tokens(step):
+            yield _chunk(completion_id, model, {"content": token})
+            if interval:
+                await asyncio.sleep(interval)
+        yield _chunk(completion_id, model, {}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/embed/chat/completions")
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "mock")
+    step = _next_step(body.get("messages", []))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+    if body.get("stream"):
+        return StreamingResponse(_stream(completion_id, model, step), media_type="text/event-stream")
+
+    tool_calls = _tool_calls(step)
+    tokens = [] if tool_calls else _tokens(step)
+    generation_time = len(tokens) / settings.tokens_per_second if settings.tokens_per_second > 0 else 0
+    await asyncio.sleep(settings.ttft_ms / 1000 + generation_time)
+    message: Dict[str, Any] = {"role": "assistant", "content": "".join(tokens) or None}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return JSONResponse({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+    })
+
+
+@app.get("/v1/embed/models")
+async def models():
+    return {"object": "list", "data": [{"id": "mock", "object": "model"}]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("MOCK_THESYS_PORT", "9000")))
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Streaming rate (0 = as fast as possible)")
+    parser.add_argument("--response-tokens", type=int, default=120, help="Length of generated responses")
+    parser.add_argument("--script", help="JSON file with a list of steps ({content} or {tool_calls})")
+    args = parser.parse_args()
+
+    settings.ttft_ms = args.ttft_ms
+    settings.tokens_per_second = args.tokens_per_second
+    settings.response_tokens = args.response_tokens
+    if args.script:
+        with open(args.script) as f:
+            settings.script = json.load(f)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Checks that the LangGraph backend's readiness probe opens with each checkpointer.
+
+For each `--checkpointer`, starts `main.py` under uvicorn with throwaway
+database files, polls `GET /ready` and exits non-zero unless it returns 200
+within `--timeout` seconds. Importing `main.py` must not create the
+database files either: they should only appear once the app warms up.
+
+    python readiness_check.py                        # memory and sqlite
+    python readiness_check.py --checkpointer sqlite --timeout 60
+
+Run it with the backend's Python environment. The model API doesn't need to
+be reachable (warm-up only logs that), but pointing THESYS_BASE_URL at
+mock_thesys.py also warms the model connection.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "langgraph-with-c1-python", "backend")
+CHECKPOINTERS = ["memory", "sqlite"]
+
+
+def check(checkpointer: str, port: int, timeout: float) -> str:
+    """Returns an empty string when /ready opened, else what went wrong."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "CHECKPOINTER": checkpointer,
+            "CHECKPOINT_DB_PATH": os.path.join(tmp, "checkpoints.sqlite"),
+            "THREAD_DB_PATH": os.path.join(tmp, "threads.sqlite"),
+            "THESYS_API_KEY": os.environ.get("THESYS_API_KEY", "mock"),
+        }
+        imported = subprocess.run([sys.executable, "-c", "import main"], cwd=BACKEND, env=env, capture_output=True, text=True)
+        if imported.returncode != 0:
+            return f"import main failed:\n{imported.stderr[-2000:]}"
+        created = sorted(os.listdir(tmp))
+        if created:
+            return f"importing main.py created {created}"
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:fastapi_app", "--port", str(port)],
+            cwd=BACKEND,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        try:
+            deadline = time.monotonic() + timeout
+            last = "no response"
+            while time.monotonic() < deadline:
+                if server.poll() is not None:
+                    return f"server exited with {server.returncode}"
+                try:
+                    response = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=5.0)
+                    if response.status_code == 200:
+                        return ""
+                    last = f"{response.status_code} {response.text}"
+                except httpx.TransportError as e:
+                    last = repr(e)
+                time.sleep(0.5)
+            return f"/ready did not return 200 within {timeout}s (last: {last})"
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpointer", choices=CHECKPOINTERS, action="append", help="Checkpointer to check (default: all)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the backend under test")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for /ready")
+    args = parser.parse_args()
+
+    failures = []
+    for checkpointer in args.checkpointer or CHECKPOINTERS:
+        problem = check(checkpointer, args.port, args.timeout)
+        if problem:
+            failures.append(checkpointer)
+            print(f"FAIL  {checkpointer}: {problem}")
+        else:
+            print(f"ok    {checkpointer}: /ready returned 200")
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
+import os
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List, Optional
+from typing import Callable, List, Optional
 from crewai_genui.thesys_llm import ThesysLLM
+from crewai_genui.response_cache import ResponseCache
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
 # https://docs.crewai.com/concepts/crews#example-crew-class-with-decorators
 
+# Research branches run concurrently, so cap how many one run can fan out into
+MAX_SUBTOPICS = int(os.getenv("CREW_MAX_SUBTOPICS", "5"))
+# Subtopics are spliced into task descriptions and agent roles, which crewai
+# interpolates as {placeholders}, so braces in them are swapped for parentheses
+_NO_BRACES = str.maketrans("{}", "()")
+
 
 @CrewBase
 class CrewaiGenui():
@@ -15,9 +23,19 @@ class CrewaiGenui():
     agents: List[BaseAgent]
     tasks: List[Task]
 
-    def __init__(self):
+    def __init__(
+        self,
+        on_token: Optional[Callable[[str], None]] = None,
+        cache: Optional[ResponseCache] = None,
+        subtopics: Optional[List[str]] = None,
+    ):
         super().__init__()
-        self.thesys = ThesysLLM()
+        # When set, research fans out into one concurrent task per (distinct) subtopic
+        self.subtopics = list(dict.fromkeys(
+            subtopic.strip().translate(_NO_BRACES) for subtopic in subtopics or [] if subtopic.strip()
+        ))[:MAX_SUBTOPICS]
+        # Stream the Thesys completion when a token callback is given
+        self.thesys = ThesysLLM(stream=on_token is not None, on_token=on_token, cache=cache)
 
     # Learn more about YAML configuration files here:
     # Agents: https://docs.crewai.com/concepts/agents#yaml-configuration-recommended
@@ -55,11 +73,41 @@ class CrewaiGenui():
             config=self.tasks_config['reporting_task'], # type: ignore[index]
         )
 
+    def fan_out_research(self) -> None:
+        """Replaces research_task with one async task per subtopic and feeds them all into reporting_task.
+
+        Each branch gets its own copy of the researcher, with a distinct role so
+        Crew.copy() maps it back to the right branch, so concurrent branches don't
+        share executor state; the original researcher is dropped from the crew. The crew waits for every branch before the
+        (synchronous) reporting task runs.
+        """
+        research = self.research_task()
+        reporting = self.reporting_task()
+        # The branches replace the original researcher, which no longer has a task
+        self.agents = [agent for agent in self.agents if agent is not research.agent]
+        branches = []
+        for subtopic in self.subtopics:
+            researcher = research.agent.copy()
+            researcher.role = f"{researcher.role.strip()} ({subtopic})"
+            branches.append(Task(
+                name=f"research_task: {subtopic}",
+                description=f"{research.description}\nFocus on this subtopic: {subtopic}",
+                expected_output=research.expected_output,
+                agent=researcher,
+                async_execution=True,
+            ))
+            self.agents.append(researcher)
+        reporting.context = branches
+        self.tasks = [task for task in self.tasks if task is not research]
+        self.tasks[self.tasks.index(reporting):self.tasks.index(reporting)] = branches
+
     @crew
     def crew(self) -> Crew:
         """Creates the CrewaiGenui crew"""
         # To learn how to add knowledge sources to your crew, check out the documentation:
         # https://docs.crewai.com/concepts/knowledge#what-is-knowledge
+        if self.subtopics:
+            self.fan_out_research()
 
         return Crew(
             agents=self.agents, # Automatically created by the @agent decorator
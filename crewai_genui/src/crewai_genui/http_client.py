@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import weakref
+from typing import Awaitable, Optional, TypeVar
+
+import httpx
+
+# Keep-alive pool shared by every ThesysLLM instance in the process
+POOL_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0)
+DEFAULT_TIMEOUT = httpx.Timeout(300.0, connect=10.0)
+
+T = TypeVar("T")
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_client: Optional[httpx.Client] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_client() -> httpx.Client:
+    """Returns the shared sync client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(http2=http2_available(), limits=POOL_LIMITS, timeout=DEFAULT_TIMEOUT)
+    return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the shared async client for the running event loop.
+
+    Async connections are bound to the loop that opened them, so each loop gets
+    its own pool. Whoever owns the loop closes it with `aclose_async_client()`
+    before the loop ends.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(http2=http2_available(), limits=POOL_LIMITS, timeout=DEFAULT_TIMEOUT)
+            _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    """Closes the running event loop's async client, if it has one."""
+    with _lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def run_closing_client(coroutine: Awaitable[T]) -> T:
+    """Awaits `coroutine`, then closes the loop's async client; wrap what you pass to asyncio.run() in it."""
+    try:
+        return await coroutine
+    finally:
+        await aclose_async_client()
+
+
+def close_clients() -> None:
+    """Closes the shared sync client. Async clients are closed per loop with `aclose_async_client()`."""
+    global _client
+    with _lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
@@ -1,10 +1,17 @@
 #!/usr/bin/env python
+import asyncio
+import queue
 import sys
+import time
 import warnings
+from concurrent.futures import Future, ThreadPoolExecutor
 import streamlit as st
 import streamlit_thesys as thesys
 from datetime import datetime
-from crewai_genui.crew import CrewaiGenui
+from crewai_genui.crew import MAX_SUBTOPICS, CrewaiGenui
+from crewai_genui.thesys_llm import ThesysLLM
+from crewai_genui.http_client import run_closing_client
+from crewai_genui.response_cache import get_default_cache
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -19,7 +26,7 @@ def run():
     }
 
     try:
-        CrewaiGenui().crew().kickoff(inputs=inputs)
+        CrewaiGenui(cache=get_default_cache()).crew().kickoff(inputs=inputs)
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
 
@@ -33,7 +40,7 @@ def train():
         'current_year': str(datetime.now().year)
     }
     try:
-        CrewaiGenui().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        CrewaiGenui(cache=get_default_cache()).crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
@@ -43,7 +50,7 @@ def replay():
     Replay the crew execution from a specific task.
     """
     try:
-        CrewaiGenui().crew().replay(task_id=sys.argv[1])
+        CrewaiGenui(cache=get_default_cache()).crew().replay(task_id=sys.argv[1])
 
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
@@ -58,15 +65,44 @@ def test():
     }
 
     try:
-        CrewaiGenui().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
+        CrewaiGenui(cache=get_default_cache()).crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
 
+@st.cache_resource(max_entries=16)
+def get_crew_template(subtopics: tuple = ()):
+    """Parses agents.yaml/tasks.yaml and builds the crew once per subtopic list, keeping the 16 most recent."""
+    return CrewaiGenui(subtopics=list(subtopics)).crew()
+
+
+@st.cache_resource
+def get_kickoff_executor():
+    """Background threads that run crew kickoffs so the script thread stays responsive."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="crew-kickoff")
+
+
+def start_kickoff(inputs: dict, events: queue.Queue, subtopics: tuple = ()) -> Future:
+    """Starts a kickoff on a copy of the cached crew, reporting progress on `events`."""
+    # Copies share the parsed config but get their own agents, tasks and LLM instances
+    crew = get_crew_template(subtopics).copy()
+    for crew_agent in crew.agents:
+        if isinstance(crew_agent.llm, ThesysLLM):
+            crew_agent.llm.stream = True
+            crew_agent.llm.on_token = lambda token: events.put(("token", token))
+    crew.task_callback = lambda output: events.put(("task", output))
+    # Each kickoff runs on its own event loop, whose async HTTP client is closed with it
+    return get_kickoff_executor().submit(asyncio.run, run_closing_client(crew.kickoff_async(inputs=inputs)))
+
+
 def streamlit_app():
     # Streamlit app
     st.title("CrewAI Research & Reporting")
     topic = st.text_input("Enter topic:", value="AI LLMs")
+    subtopics_input = st.text_input(
+        "Research subtopics in parallel (optional, comma-separated):",
+        placeholder="e.g. open-weight models, inference cost, agents",
+    )
 
     if st.button("Run Analysis"):
         inputs = {
@@ -74,12 +110,41 @@ def streamlit_app():
             'current_year': str(datetime.now().year)
         }
 
-        with st.spinner("Running analysis..."):
+        events: queue.Queue = queue.Queue()
+        subtopics = tuple(dict.fromkeys(s.strip() for s in subtopics_input.split(",") if s.strip()))
+        if len(subtopics) > MAX_SUBTOPICS:
+            st.warning(f"Researching only the first {MAX_SUBTOPICS} subtopics.")
+            subtopics = subtopics[:MAX_SUBTOPICS]
+        future = start_kickoff(inputs, events, subtopics)
+
+        # Show task progress and render the report progressively as it streams
+        status = st.status("Running analysis...", expanded=True)
+        placeholder = st.empty()
+        tokens = []
+        last_render = 0.0
+        while not (future.done() and events.empty()):
             try:
-                result = CrewaiGenui().crew().kickoff(inputs=inputs)
+                kind, value = events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if kind == "task":
+                status.write(f"Finished task: {value.name or value.description[:80]}")
+            elif kind == "token":
+                tokens.append(value)
+                # Re-rendering on every token is expensive, so refresh a few times per second
+                if time.monotonic() - last_render >= 0.3:
+                    last_render = time.monotonic()
+                    with placeholder.container():
+                        thesys.render_response("".join(tokens))
+
+        try:
+            result = future.result()
+            status.update(label="Analysis complete", state="complete", expanded=False)
+            with placeholder.container():
                 thesys.render_response(result.raw if hasattr(result, 'raw') else str(result))
-            except Exception as e:
-                st.error(f"Error: {e}")
+        except Exception as e:
+            status.update(label="Analysis failed", state="error")
+            st.error(f"Error: {e}")
 
 if __name__ == "__main__":
     streamlit_app()
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+"""
+
+
+class ResponseCache:
+    """Content-addressed, size-bounded on-disk cache of LLM responses.
+
+    Keys are a SHA-256 of the canonical request (endpoint, model, messages,
+    tools, temperature), so identical crew runs replay from disk. When the stored
+    responses exceed `max_bytes`, the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(
+        endpoint: str,
+        model: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[dict]],
+        temperature: Optional[float],
+    ) -> str:
+        request = {"endpoint": endpoint, "model": model, "messages": messages, "tools": tools or [], "temperature": temperature}
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._connection() as conn:
+            row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        size = len(response.encode())
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if total - freed <= self.max_bytes:
+                break
+            stale.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """Returns the on-disk cache configured by THESYS_CACHE*, or None unless enabled with THESYS_CACHE=1."""
+    global _default_cache
+    # Opt-in: a cache hit replays an earlier completion instead of calling the model
+    if os.getenv("THESYS_CACHE", "0").lower() not in ("1", "true", "yes"):
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache(
+                    path=os.getenv("THESYS_CACHE_PATH", ".cache/thesys_responses.sqlite"),
+                    max_bytes=int(os.getenv("THESYS_CACHE_MAX_MB", "256")) * 1024 * 1024,
+                )
+    return _default_cache
@@ -0,0 +1,249 @@
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+import httpx
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait according to the response headers, or None if they don't say."""
+    headers = response.headers
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if "retry-after" in headers:
+        value = headers["retry-after"]
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset"):
+        if name in headers:
+            seconds = parse_duration(headers[name])
+            if seconds is not None:
+                return seconds
+    return None
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parses durations such as "20ms", "1s", "6m0s" or a plain number of seconds."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes a token (possibly going into debt) and returns how long the caller must wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            return max(wait, self._paused_until - now)
+
+    def pause(self, seconds: float) -> None:
+        """Holds back every caller for `seconds`, e.g. when the server reports the limit is exhausted."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class RequestScheduler:
+    """Rate-limited, retrying request scheduler for the Thesys endpoint.
+
+    Requests wait for a token-bucket slot and an in-flight permit, so bursts are
+    queued instead of failing. 429/5xx responses and transport errors are
+    retried, honouring Retry-After and rate-limit reset headers and otherwise
+    using full-jitter exponential backoff.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = 5.0,
+        burst: int = 10,
+        max_in_flight: int = 8,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ):
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._async_in_flight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_in_flight.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._async_in_flight[loop] = semaphore
+        return semaphore
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _next_delay(self, response: Optional[httpx.Response], attempt: int) -> Optional[float]:
+        """Delay before retrying, or None if the outcome should not be retried."""
+        if attempt >= self.max_retries:
+            return None
+        if response is None:
+            return self._backoff(attempt)
+        if response.status_code not in RETRYABLE_STATUS_CODES:
+            return None
+        retry_after = parse_retry_after(response)
+        if retry_after is None:
+            return self._backoff(attempt)
+        if response.status_code == 429:
+            self.bucket.pause(retry_after)
+        return min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+
+    def _observe(self, response: httpx.Response) -> None:
+        # Stop sending before the server starts rejecting
+        if response.headers.get("x-ratelimit-remaining-requests") == "0":
+            reset = parse_retry_after(response)
+            if reset:
+                self.bucket.pause(reset)
+
+    def _open(self, send: Callable[[], httpx.Response]) -> httpx.Response:
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                response = send()
+            except httpx.TransportError as e:
+                delay = self._next_delay(None, attempt)
+                if delay is None:
+                    raise
+                print(f"Thesys request failed ({e!r}), retrying in {delay:.2f}s")
+            else:
+                self._observe(response)
+                if response.is_success:
+                    return response
+                delay = self._next_delay(response, attempt)
+                response.close()
+                if delay is None:
+                    response.raise_for_status()
+                print(f"Thesys request returned {response.status_code}, retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    async def _aopen(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        attempt = 0
+        while True:
+            await self.bucket.aacquire()
+            try:
+                response = await send()
+            except httpx.TransportError as e:
+                delay = self._next_delay(None, attempt)
+                if delay is None:
+                    raise
+                print(f"Thesys request failed ({e!r}), retrying in {delay:.2f}s")
+            else:
+                self._observe(response)
+                if response.is_success:
+                    return response
+                delay = self._next_delay(response, attempt)
+                await response.aclose()
+                if delay is None:
+                    response.raise_for_status()
+                print(f"Thesys request returned {response.status_code}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @contextmanager
+    def stream(self, client: httpx.Client, method: str, url: str, **kwargs) -> Iterator[httpx.Response]:
+        """Opens a streamed response with rate limiting and retries; the in-flight permit is held until exit."""
+        with self._in_flight:
+            response = self._open(lambda: client.send(client.build_request(method, url, **kwargs), stream=True))
+            try:
+                yield response
+            finally:
+                response.close()
+
+    def request(self, client: httpx.Client, method: str, url: str, **kwargs) -> httpx.Response:
+        """Sends a request with rate limiting and retries and returns the fully read response."""
+        with self.stream(client, method, url, **kwargs) as response:
+            response.read()
+            return response
+
+    @asynccontextmanager
+    async def astream(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Async variant of `stream`."""
+        async with self._async_semaphore():
+            response = await self._aopen(lambda: client.send(client.build_request(method, url, **kwargs), stream=True))
+            try:
+                yield response
+            finally:
+                await response.aclose()
+
+    async def arequest(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+        """Async variant of `request`."""
+        async with self.astream(client, method, url, **kwargs) as response:
+            await response.aread()
+            return response
+
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """Returns the process-wide scheduler shared by all ThesysLLM instances."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler(
+                    requests_per_second=float(os.getenv("THESYS_REQUESTS_PER_SECOND", "5")),
+                    burst=int(os.getenv("THESYS_BURST", "10")),
+                    max_in_flight=int(os.getenv("THESYS_MAX_IN_FLIGHT", "8")),
+                    max_retries=int(os.getenv("THESYS_MAX_RETRIES", "5")),
+                )
+    return _scheduler
@@ -1,7 +1,25 @@
 from crewai import BaseLLM, Task
+import json
 import os
-import requests
-from typing import List, Optional, Union, Dict, Any
+import time
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, Optional, Union, Dict, Any
+
+from crewai_genui.http_client import get_async_client, get_client
+from crewai_genui.response_cache import ResponseCache
+from crewai_genui.scheduler import get_scheduler
+
+def _parse_sse_line(line: str) -> Optional[str]:
+    """Returns the content delta carried by one `data:` line of a streamed completion, if any."""
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if not data or data == "[DONE]":
+        return None
+    choices = json.loads(data).get("choices") or []
+    if not choices:
+        return None
+    return (choices[0].get("delta") or {}).get("content") or None
+
 
 class ThesysLLM(BaseLLM):
     # def __init__(self, model: str="gpt-4o-mini", temperature: Optional[float] = None):
@@ -10,23 +28,34 @@ class ThesysLLM(BaseLLM):
     #     self.api_key = os.getenv("OPENAI_API_KEY")
 
 
-    def __init__(self, model: str="c1/anthropic/claude-sonnet-4/v-20250815", temperature: Optional[float] = None):
+    def __init__(
+        self,
+        model: str="c1/anthropic/claude-sonnet-4/v-20250815",
+        temperature: Optional[float] = None,
+        stream: bool = False,
+        on_token: Optional[Callable[[str], None]] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
         super().__init__(model=model, temperature=temperature)
-        self.endpoint = "https://api.thesys.dev/v1/embed"
+        self.endpoint = os.getenv("THESYS_BASE_URL", "https://api.thesys.dev/v1/embed")
         self.api_key = os.getenv("THESYS_API_KEY")
+        # When streaming, `call` consumes the SSE stream and reports each delta to `on_token`
+        self.stream = stream
+        self.on_token = on_token
+        # Time to first token (seconds) of the most recent streamed call
+        self.last_ttft: Optional[float] = None
+        # Optional on-disk cache of responses keyed on the request content
+        self.cache = cache
 
-    def call(
+    def _build_payload(
         self,
         messages: Union[str, List[Dict[str, str]]],
         tools: Optional[List[dict]] = None,
-        **kwargs: Any
-    ) -> str:
-        """Call the LLM with the given messages."""
+    ) -> Dict[str, Any]:
         # Convert string to message format if needed
         if isinstance(messages, str):
             messages = [{"role": "user", "content": messages}]
 
-        # Prepare request
         payload = {
             "model": self.model,
             "messages": messages,
@@ -36,18 +65,142 @@ class ThesysLLM(BaseLLM):
         # Add tools if provided and supported
         if tools and self.supports_function_calling():
             payload["tools"] = tools
+        return payload
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _cache_key(self, messages: Union[str, List[Dict[str, str]]], tools: Optional[List[dict]]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        payload = self._build_payload(messages, tools)
+        return self.cache.key(self.endpoint, payload["model"], payload["messages"], payload.get("tools"), payload["temperature"])
+
+    def _cached(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        # Empty entries (from before they were skipped) are treated as misses
+        response = self.cache.get(key) or None
+        if response is not None and self.stream and self.on_token is not None:
+            self.on_token(response)
+        return response
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        **kwargs: Any
+    ) -> str:
+        """Call the LLM with the given messages."""
+        key = self._cache_key(messages, tools)
+        response = self._cached(key)
+        if response is None:
+            response = self._complete(messages, tools)
+            # Tool-call responses have no content (None, or "" when streamed); they aren't cached
+            if key is not None and response:
+                self.cache.put(key, response)
+        return response
+
+    async def acall(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        **kwargs: Any
+    ) -> str:
+        """Async variant of `call` using the shared async client."""
+        key = self._cache_key(messages, tools)
+        response = self._cached(key)
+        if response is None:
+            response = await self._acomplete(messages, tools)
+            # Tool-call responses have no content (None, or "" when streamed); they aren't cached
+            if key is not None and response:
+                self.cache.put(key, response)
+        return response
+
+    def _complete(self, messages: Union[str, List[Dict[str, str]]], tools: Optional[List[dict]]) -> str:
+        if self.stream:
+            return "".join(self.stream_call(messages, tools, on_token=self.on_token))
 
-        # Make API call
-        response = requests.post(
+        # Reuses pooled keep-alive connections shared by all ThesysLLM instances; the
+        # scheduler queues on rate limits and retries 429/5xx responses
+        response = get_scheduler().request(
+            get_client(),
+            "POST",
             self.endpoint + "/chat/completions",
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            },
-            json=payload,
-            timeout=300
+            headers=self._headers(),
+            json=self._build_payload(messages, tools),
+        )
+
+        result = response.json()
+        return result["choices"][0]["message"]["content"]
+
+    async def _acomplete(self, messages: Union[str, List[Dict[str, str]]], tools: Optional[List[dict]]) -> str:
+        if self.stream:
+            return "".join([delta async for delta in self.astream_call(messages, tools, on_token=self.on_token)])
+
+        response = await get_scheduler().arequest(
+            get_async_client(),
+            "POST",
+            self.endpoint + "/chat/completions",
+            headers=self._headers(),
+            json=self._build_payload(messages, tools),
         )
-        response.raise_for_status()
 
         result = response.json()
         return result["choices"][0]["message"]["content"]
+
+    def _deltas(self, lines: Iterable[str], started_at: float, on_token: Optional[Callable[[str], None]]) -> Iterator[str]:
+        for line in lines:
+            delta = _parse_sse_line(line)
+            if delta is None:
+                continue
+            if self.last_ttft is None:
+                self.last_ttft = time.perf_counter() - started_at
+            if on_token is not None:
+                on_token(delta)
+            yield delta
+
+    def stream_call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> Iterator[str]:
+        """Streams the completion with `stream: true`, yielding content deltas as they arrive."""
+        payload = self._build_payload(messages, tools)
+        payload["stream"] = True
+        self.last_ttft = None
+        started_at = time.perf_counter()
+        with get_scheduler().stream(
+            get_client(),
+            "POST",
+            self.endpoint + "/chat/completions",
+            headers=self._headers(),
+            json=payload,
+        ) as response:
+            yield from self._deltas(response.iter_lines(), started_at, on_token)
+
+    async def astream_call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> AsyncIterator[str]:
+        """Async variant of `stream_call`."""
+        payload = self._build_payload(messages, tools)
+        payload["stream"] = True
+        self.last_ttft = None
+        started_at = time.perf_counter()
+        async with get_scheduler().astream(
+            get_async_client(),
+            "POST",
+            self.endpoint + "/chat/completions",
+            headers=self._headers(),
+            json=payload,
+        ) as response:
+            async for line in response.aiter_lines():
+                for delta in self._deltas((line,), started_at, on_token):
+                    yield delta
@@ -4,12 +4,14 @@ Uses OpenAI client through ADK's LiteLLM wrapper for model-agnostic agent framew
 Integrates with C1Chat interface through streaming responses.
 """
 
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
+import asyncio
 import os
+import threading
+from contextlib import aclosing
 from google.genai.types import Content, Part
 from google.adk.agents import LlmAgent
-from google.adk.models.lite_llm import LiteLlm
-from google.adk.sessions import InMemorySessionService
+from google.adk.events import Event
 from google.adk.runners import Runner
 from google.adk.agents.run_config import RunConfig, StreamingMode
 from config import (
@@ -19,7 +21,33 @@ from config import (
     SYSTEM_PROMPT,
     APP_NAME,
     USER_ID,
+    SESSION_MAX_SESSIONS,
+    SESSION_TTL_SECONDS,
+    SESSION_MAX_EVENTS,
+    SESSION_SPILL_DB_PATH,
+    SESSION_SHARDS,
+    SESSION_DB_URL,
 )
+from session_store import BoundedSessionService, DatabaseSessionStore
+from streaming import DeltaAssembler
+
+
+def create_session_service():
+    """
+    Shared database sessions when SESSION_DB_URL is set (required for multiple
+    workers), otherwise the bounded in-memory store.
+    """
+    if SESSION_DB_URL:
+        return DatabaseSessionStore(SESSION_DB_URL)
+    # Idle and least recently used sessions are evicted (or spilled to SQLite)
+    # so memory stays bounded
+    return BoundedSessionService(
+        max_sessions=SESSION_MAX_SESSIONS,
+        ttl_seconds=SESSION_TTL_SECONDS,
+        max_events=SESSION_MAX_EVENTS,
+        spill_db_path=SESSION_SPILL_DB_PATH,
+        num_shards=SESSION_SHARDS,
+    )
 
 
 class AssistantAgent:
@@ -35,6 +63,9 @@ class AssistantAgent:
         if THESYS_BASE_URL:
             os.environ["OPENAI_API_BASE"] = THESYS_BASE_URL
 
+        # LiteLLM is slow to import; load it on first use so workers start quickly
+        from google.adk.models.lite_llm import LiteLlm
+
         # Create LiteLLM model instance pointing to OpenAI
         model = LiteLlm(model=THESYS_MODEL)
 
@@ -47,17 +78,17 @@ class AssistantAgent:
         )
 
         # Session service for managing conversation state
-        self.session_service = InMemorySessionService()
+        self.session_service = create_session_service()
 
         # Runner to execute agent
         self.runner = Runner(
-            app_name="c1chat_assistant",
+            app_name=APP_NAME,
             agent=self.agent,
             session_service=self.session_service,
         )
 
     async def process_message(
-        self, thread_id: str, user_message: str
+        self, thread_id: str, user_message: str, user_id: str = USER_ID
     ) -> AsyncGenerator[str, None]:
         """
         Process a user message and stream the response using Google ADK + OpenAI.
@@ -65,40 +96,93 @@ class AssistantAgent:
         Args:
             thread_id: Unique identifier for the conversation thread
             user_message: The user's message content
+            user_id: The user the thread belongs to; sessions are scoped per user
 
         Yields:
-            Chunks of the assistant's response in SSE format
+            New text of the assistant's response, each piece sent exactly once
         """
         # Create content for ADK
         content = Content(role="user", parts=[Part(text=user_message)])
-        session = await self.session_service.get_session(
-            app_name=APP_NAME, user_id=USER_ID, session_id=thread_id
+        # Atomic, so concurrent first messages on a thread share one session
+        session = await self.session_service.get_or_create_session(
+            app_name=APP_NAME, user_id=user_id, session_id=thread_id
         )
 
-        if not session:
-            # If it doesn't exist, create it explicitly
-            session = await self.session_service.create_session(
-                app_name=APP_NAME, user_id=USER_ID, session_id=thread_id
-            )
-
         # Configure streaming mode for real-time chunk-by-chunk streaming
         run_config = RunConfig(
             streaming_mode=StreamingMode.SSE,
             response_modalities=["TEXT"],
         )
 
-        # Run the agent with streaming enabled
-        async for event in self.runner.run_async(
-            user_id=USER_ID,
-            session_id=session.id,
-            new_message=content,
-            run_config=run_config,
-        ):
-            if event.content and event.content.parts:
-                for part in event.content.parts:
-                    if part.text:
-                        yield part.text
-
-
-# Global agent instance
-assistant_agent = AssistantAgent()
+        # Run the agent with streaming enabled; the final event of each model
+        # response repeats the partials' text, so only unseen text is yielded
+        assembler = DeltaAssembler()
+        try:
+            # aclosing stops the run (and its model request) if we are cancelled
+            async with aclosing(self.runner.run_async(
+                user_id=user_id,
+                session_id=session.id,
+                new_message=content,
+                run_config=run_config,
+            )) as events:
+                async for event in events:
+                    delta = assembler.feed(event)
+                    if delta:
+                        yield delta
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client disconnected mid-answer: keep the partial text it saw in
+            # the session. Shielded so a repeated cancellation can't interrupt it.
+            await asyncio.shield(
+                self._save_partial_responses(user_id, session.id, assembler)
+            )
+            raise
+
+    async def _save_partial_responses(
+        self, user_id: str, session_id: str, assembler: DeltaAssembler
+    ) -> None:
+        """Appends responses cut short by a disconnect as final events."""
+        unfinished = assembler.unfinished()
+        if not unfinished:
+            return
+        session = await self.session_service.get_session(
+            app_name=APP_NAME, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            return
+        for invocation_id, author, text in unfinished:
+            await self.session_service.append_event(
+                session,
+                Event(
+                    invocation_id=invocation_id,
+                    author=author,
+                    content=Content(role="model", parts=[Part(text=text)]),
+                ),
+            )
+
+
+# Agent instance, created at startup (or on first use) in each worker process
+_assistant_agent: Optional[AssistantAgent] = None
+_assistant_agent_lock = threading.Lock()
+
+
+def get_assistant_agent() -> AssistantAgent:
+    """Returns this process's agent, building it (and LiteLLM) on first use."""
+    global _assistant_agent
+    if _assistant_agent is None:
+        with _assistant_agent_lock:
+            if _assistant_agent is None:
+                _assistant_agent = AssistantAgent()
+    return _assistant_agent
+
+
+async def aget_assistant_agent() -> AssistantAgent:
+    """Like get_assistant_agent(), but builds the agent in a thread so the event loop keeps serving."""
+    if _assistant_agent is not None:
+        return _assistant_agent
+    return await asyncio.to_thread(get_assistant_agent)
+
+
+async def close_assistant_agent() -> None:
+    """Closes the session store if the agent was ever created."""
+    if _assistant_agent is not None:
+        await _assistant_agent.session_service.close()
@@ -3,15 +3,22 @@ FastAPI Server for Google ADK + C1Chat Integration
 Provides streaming chat endpoint compatible with C1Chat component.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
+import re
 import uvicorn
 
-from agents.assistant import assistant_agent
-from config import PORT, FRONTEND_URL
+from agents.assistant import aget_assistant_agent, close_assistant_agent
+from config import PORT, FRONTEND_URL, USER_ID, WORKERS, RELOAD, SESSION_DB_URL
+from streaming import cancel_on_disconnect, frame
+from admission import AdmissionController, AdmissionRejected, hold
+
+USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9._@:-]{1,128}$")
 
 
 # Request/Response Models
@@ -29,6 +36,7 @@ class ChatRequest(BaseModel):
     prompt: ChatMessage
     threadId: str
     responseId: Optional[str] = None
+    userId: Optional[str] = None
 
 
 # Initialize FastAPI app
@@ -38,6 +46,9 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Caps concurrent chat turns in this worker, one at a time per thread
+admission = AdmissionController()
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -64,33 +75,91 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/api/sessions/stats")
+async def session_stats():
+    """Session store occupancy, eviction and compaction counters"""
+    return (await aget_assistant_agent()).session_service.stats()
+
+
+@app.get("/api/admission/stats")
+async def admission_stats():
+    """Chat admission queue depth, wait times and rejections"""
+    return admission.stats()
+
+
+# Holds the startup build of the agent so it isn't garbage collected mid-run
+_build_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def build_agent():
+    """Builds the agent (and loads LiteLLM) in the background without delaying startup."""
+    global _build_task
+    _build_task = asyncio.create_task(aget_assistant_agent())
+
+
+@app.on_event("shutdown")
+async def close_session_store():
+    await close_assistant_agent()
+
+
 @app.post("/api/chat")
-async def chat(request: ChatRequest):
+async def chat(
+    request: ChatRequest,
+    http_request: Request,
+    x_user_id: Optional[str] = Header(None),
+):
     """
     Chat endpoint compatible with C1Chat component.
     Streams responses from the ADK agent.
 
     Args:
         request: ChatRequest containing the user's message and thread ID
+        http_request: The raw request, polled for client disconnects
+        x_user_id: X-User-Id header, used when the body has no userId
 
     Returns:
-        StreamingResponse with text/event-stream content
+        StreamingResponse with text/event-stream content, or 503 with
+        Retry-After when the server is saturated
     """
+    # Sessions are scoped per user; anonymous requests share the default user
+    user_id = request.userId or x_user_id or USER_ID
+    if not USER_ID_PATTERN.match(user_id):
+        raise HTTPException(status_code=400, detail="Invalid user id")
+
+    # Awaited before admission so a ticket is never held while the agent builds
+    agent = await aget_assistant_agent()
+
+    try:
+        # "/" can't appear in a user id, so the key is unique per user and thread
+        ticket = await admission.acquire(f"{user_id}/{request.threadId}")
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy ({e.reason}), retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
     try:
         # Extract user message
         user_message = request.prompt.content
         thread_id = request.threadId
-        # Return streaming response
+        # Disconnects cancel the agent run instead of letting it finish unobserved
+        stream = frame(agent.process_message(thread_id, user_message, user_id))
+        # Return streaming response; the ticket is released when the stream ends,
+        # or by the background task if it never starts
         return StreamingResponse(
-            assistant_agent.process_message(thread_id, user_message),
+            hold(ticket, cancel_on_disconnect(stream, http_request.is_disconnected)),
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache, no-transform",
                 "Connection": "keep-alive",
             },
+            background=BackgroundTask(ticket.release),
         )
 
     except Exception as e:
+        await ticket.release()
         print(f"Chat endpoint error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -100,4 +169,14 @@ if __name__ == "__main__":
     print(f"Frontend URL: {FRONTEND_URL}")
     print(f"API will be available at: http://localhost:{PORT}/api/chat")
 
-    uvicorn.run("main:app", host="0.0.0.0", port=PORT, reload=True, log_level="info")
+    if WORKERS > 1 and not SESSION_DB_URL:
+        print("Warning: sessions are kept per worker; set SESSION_DB_URL so any worker can serve any thread")
+
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=PORT,
+        workers=WORKERS,
+        reload=RELOAD and WORKERS == 1,
+        log_level="info",
+    )
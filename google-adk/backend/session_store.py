@@ -0,0 +1,347 @@
+"""
+Bounded session service for the ADK assistant.
+
+Keeps at most `max_sessions` sessions in memory, evicting the least recently
+used ones and any idle for longer than `ttl_seconds`. Sessions are spread over
+`num_shards` shards, each with its own LRU and lock, so get-or-create calls for
+different threads rarely wait on each other. Each session's event history is
+compacted to its last `max_events` events. When a spill database is
+configured, evicted sessions are written to SQLite and transparently restored
+the next time their thread is used.
+
+For multi-worker deployments, `DatabaseSessionStore` keeps sessions in a shared
+database instead, so any worker can serve any thread.
+"""
+
+import asyncio
+import copy
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event
+from google.adk.sessions import DatabaseSessionService, InMemorySessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+
+SessionKey = Tuple[str, str, str]
+
+# get_or_create_session callers only need the session id, not its history
+_NO_EVENTS = GetSessionConfig(num_recent_events=0)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, session_id)
+);
+"""
+
+
+class SessionSpillStore:
+    """SQLite store for sessions evicted from memory, serialized as JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def put(self, session: Session) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (app_name, user_id, session_id, data, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session.app_name, session.user_id, session.id, session.model_dump_json(), time.time()),
+            )
+
+    def pop(self, key: SessionKey) -> Optional[Session]:
+        """Removes and returns a spilled session; it becomes resident again."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+            )
+        return Session.model_validate_json(row[0])
+
+    def delete(self, key: SessionKey) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?", key
+            )
+
+    def list(self, app_name: str, user_id: Optional[str] = None) -> List[Session]:
+        query = "SELECT data FROM sessions WHERE app_name = ?"
+        params: Tuple[str, ...] = (app_name,)
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params += (user_id,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [Session.model_validate_json(data) for (data,) in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _Shard:
+    """A slice of the resident sessions with its own LRU order and lock."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.lock = asyncio.Lock()
+        # Resident sessions in least-recently-used order, with their last access time
+        self.lru: "OrderedDict[SessionKey, float]" = OrderedDict()
+
+
+class BoundedSessionService(InMemorySessionService):
+    """
+    InMemorySessionService with LRU/TTL eviction, per-session event compaction
+    and an optional SQLite spill tier for evicted sessions.
+
+    App- and user-scoped state stay in memory; only sessions are evicted.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 3600.0,
+        max_events: int = 200,
+        spill_db_path: Optional[str] = None,
+        num_shards: int = 16,
+    ):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_events = max_events
+        self.spill = SessionSpillStore(spill_db_path) if spill_db_path else None
+        num_shards = max(1, min(num_shards, max_sessions))
+        self._shards = [_Shard(math.ceil(max_sessions / num_shards)) for _ in range(num_shards)]
+        self.evictions = 0
+        self.restores = 0
+        self.compacted_events = 0
+
+    def _resident(self, key: SessionKey) -> Optional[Session]:
+        app_name, user_id, session_id = key
+        return self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+
+    def _shard(self, key: SessionKey) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def _touch(self, key: SessionKey) -> None:
+        shard = self._shard(key)
+        shard.lru[key] = time.monotonic()
+        shard.lru.move_to_end(key)
+        self._evict(shard)
+
+    def _evict(self, shard: _Shard) -> None:
+        deadline = time.monotonic() - self.ttl_seconds if self.ttl_seconds > 0 else None
+        while shard.lru:
+            key, last_access = next(iter(shard.lru.items()))
+            if len(shard.lru) <= shard.capacity and (deadline is None or last_access >= deadline):
+                break
+            shard.lru.pop(key)
+            self._remove_resident(key, spill=True)
+            self.evictions += 1
+
+    def _remove_resident(self, key: SessionKey, spill: bool) -> None:
+        app_name, user_id, session_id = key
+        user_sessions = self.sessions.get(app_name, {}).get(user_id)
+        if not user_sessions or session_id not in user_sessions:
+            return
+        session = user_sessions.pop(session_id)
+        if not user_sessions:
+            del self.sessions[app_name][user_id]
+        if spill and self.spill is not None:
+            self.spill.put(session)
+
+    def _restore(self, key: SessionKey) -> Optional[Session]:
+        """Makes a spilled session resident again, if there is one."""
+        if self.spill is None:
+            return None
+        session = self.spill.pop(key)
+        if session is None:
+            return None
+        app_name, user_id, session_id = key
+        self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[session_id] = session
+        self.restores += 1
+        return session
+
+    def _compact(self, session: Session) -> None:
+        """Keeps the last `max_events` events, starting the tail at a user turn."""
+        excess = len(session.events) - self.max_events
+        if self.max_events <= 0 or excess <= 0:
+            return
+        start = excess
+        # Don't start the history halfway through a model/tool exchange
+        while start < len(session.events) and session.events[start].author != "user":
+            start += 1
+        if start == len(session.events):
+            start = excess
+        del session.events[:start]
+        self.compacted_events += start
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        if session_id:
+            # Creating over a spilled session would silently fork the thread
+            self._restore((app_name, user_id, session_id.strip()))
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        self._touch((app_name, user_id, session.id))
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id.strip() if session_id else session_id)
+        if self._resident(key) is None and self._restore(key) is None:
+            return None
+        self._touch(key)
+        return await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+
+    async def get_or_create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        state: Optional[Dict[str, Any]] = None,
+    ) -> Session:
+        """
+        Returns the session (without its events), creating it first if needed,
+        atomically per shard.
+        """
+        key = (app_name, user_id, session_id.strip())
+        async with self._shard(key).lock:
+            session = await self.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id, config=_NO_EVENTS
+            )
+            if session is None:
+                session = await self.create_session(
+                    app_name=app_name, user_id=user_id, state=state, session_id=session_id
+                )
+        return session
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        response = await super().list_sessions(app_name=app_name, user_id=user_id)
+        if self.spill is not None:
+            for session in self.spill.list(app_name, user_id):
+                response.sessions.append(session.model_copy(update={"events": []}))
+            response.sessions.sort(key=lambda s: (s.last_update_time, s.user_id, s.id))
+        return response
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        key = (app_name, user_id, session_id.strip() if session_id else session_id)
+        self._shard(key).lru.pop(key, None)
+        self._remove_resident(key, spill=False)
+        if self.spill is not None:
+            self.spill.delete(key)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        if self._resident(key) is None and self._restore(key) is None:
+            # Evicted mid-invocation without a spill tier: re-register the caller's copy
+            self.sessions.setdefault(session.app_name, {}).setdefault(session.user_id, {})[
+                session.id
+            ] = copy.deepcopy(session)
+        event = await super().append_event(session=session, event=event)
+        self._compact(self._resident(key))
+        self._touch(key)
+        return event
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "resident_sessions": sum(len(shard.lru) for shard in self._shards),
+            "resident_users": sum(len(users) for users in self.sessions.values()),
+            "resident_events": sum(
+                len(s.events) for users in self.sessions.values() for sessions in users.values() for s in sessions.values()
+            ),
+            "spilled_sessions": self.spill.count() if self.spill is not None else None,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "max_events": self.max_events,
+            "shards": len(self._shards),
+            "evictions": self.evictions,
+            "restores": self.restores,
+            "compacted_events": self.compacted_events,
+        }
+
+    async def close(self) -> None:
+        if self.spill is not None:
+            self.spill.close()
+
+
+class DatabaseSessionStore(DatabaseSessionService):
+    """
+    DatabaseSessionService shared by every worker process (e.g. Postgres, or
+    SQLite on a shared volume). Sessions are not evicted or compacted here.
+    """
+
+    async def get_or_create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        state: Optional[Dict[str, Any]] = None,
+    ) -> Session:
+        """Returns the session (without its events), creating it first if needed."""
+        session = await self.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=_NO_EVENTS
+        )
+        if session is not None:
+            return session
+        try:
+            return await self.create_session(
+                app_name=app_name, user_id=user_id, state=state, session_id=session_id
+            )
+        except AlreadyExistsError:
+            # Another worker created it between our read and insert
+            return await self.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id, config=_NO_EVENTS
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "database", "url": self.db_engine.url.render_as_string(hide_password=True)}
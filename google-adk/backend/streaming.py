@@ -0,0 +1,165 @@
+"""
+Response stream shaping: de-duplicating ADK's partial/final events into text
+deltas, coalescing small deltas into larger frames, and optional SSE framing.
+
+Vendored on purpose: each example is self-contained. The coalescing and
+framing code is kept in sync with langgraph-with-c1-python/backend/streaming.py,
+which reads its settings from the environment.
+"""
+
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from google.adk.events import Event
+
+from config import (
+    STREAM_FORMAT,
+    STREAM_COALESCE_MAX_CHARS,
+    STREAM_COALESCE_MAX_DELAY_MS,
+    STREAM_DISCONNECT_POLL_MS,
+)
+
+
+class DeltaAssembler:
+    """
+    Turns ADK events into text deltas without repeats.
+
+    With StreamingMode.SSE, each model response arrives as partial events
+    carrying new text followed by a final event carrying the whole text again.
+    Text streamed so far is tracked per invocation and author, so the final
+    event only contributes whatever the partials did not already cover.
+    """
+
+    def __init__(self):
+        self._streamed: Dict[Tuple[str, str], str] = {}
+
+    def feed(self, event: Event) -> str:
+        if not event.content or not event.content.parts:
+            text = ""
+        else:
+            text = "".join(part.text for part in event.content.parts if part.text)
+        key = (event.invocation_id, event.author)
+        if event.partial:
+            if text:
+                self._streamed[key] = self._streamed.get(key, "") + text
+            return text
+        streamed = self._streamed.pop(key, "")
+        if not streamed:
+            # Not streamed (e.g. a non-streaming model): the final event is the response
+            return text
+        if text.startswith(streamed):
+            return text[len(streamed):]
+        return ""
+
+    def unfinished(self) -> List[Tuple[str, str, str]]:
+        """(invocation_id, author, text) of responses streamed without a final event yet."""
+        return [(invocation_id, author, text) for (invocation_id, author), text in self._streamed.items()]
+
+
+def sse_event(data: str, event: Optional[str] = None) -> str:
+    """Frames `data` as a single server-sent event, splitting multi-line payloads."""
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+async def coalesce(
+    chunks: AsyncIterable[str],
+    max_chars: int = STREAM_COALESCE_MAX_CHARS,
+    max_delay: float = STREAM_COALESCE_MAX_DELAY_MS / 1000,
+) -> AsyncIterator[str]:
+    """Merges small chunks, flushing when `max_chars` is buffered or `max_delay` has passed
+    since the first buffered chunk, even if the upstream is idle (e.g. during a tool call)."""
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    buffer: List[str] = []
+    size = 0
+    deadline = 0.0
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield "".join(buffer)
+                buffer, size = [], 0
+                continue
+
+            try:
+                chunk = pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+
+            if not buffer:
+                deadline = loop.time() + max_delay
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= max_chars:
+                yield "".join(buffer)
+                buffer, size = [], 0
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            # Let the cancelled step unwind before closing the generator it is running
+            await asyncio.wait({pending})
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def frame(chunks: AsyncIterable[str], stream_format: str = STREAM_FORMAT) -> AsyncIterator[str]:
+    """Coalesces text chunks and applies the configured wire format."""
+    async for chunk in coalesce(chunks):
+        yield sse_event(chunk) if stream_format == "sse" else chunk
+    if stream_format == "sse":
+        yield sse_event("[DONE]", event="done")
+
+
+async def cancel_on_disconnect(
+    chunks: AsyncIterable[str],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_interval: float = STREAM_DISCONNECT_POLL_MS / 1000,
+) -> AsyncIterator[str]:
+    """Passes `chunks` through, cancelling the upstream as soon as the client disconnects.
+
+    The upstream step runs as a task so disconnects are noticed while it is idle
+    (waiting on the model or a tool), not only on the next write. The client is
+    checked at most once per `poll_interval`.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    next_check = loop.time() + poll_interval
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=max(0.0, next_check - loop.time()))
+            if done:
+                try:
+                    chunk = pending.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    pending = None
+                yield chunk
+
+            if loop.time() >= next_check:
+                if await is_disconnected():
+                    print("Client disconnected, cancelling the response")
+                    break
+                next_check = loop.time() + poll_interval
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.wait({pending})
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
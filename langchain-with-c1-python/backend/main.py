@@ -1,16 +1,19 @@
 #!/usr/bin/env python
+import asyncio
 import os
-import sqlite3
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.tools import tool
-from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import StructuredTool
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain.agents import create_openai_tools_agent, AgentExecutor
 from fastapi import FastAPI
 from langserve import add_routes
 from pydantic import BaseModel
 
+from sql_engine import get_engine
+from query_cache import get_query_cache
+
 
 # Input model
 class ChainInput(BaseModel):
@@ -20,49 +23,46 @@ class ChainInput(BaseModel):
 
 # 1. Create model
 model = ChatOpenAI(
-    base_url="https://api.thesys.dev/v1/embed",
+    base_url=os.environ.get("THESYS_BASE_URL", "https://api.thesys.dev/v1/embed"),
     model="c1/anthropic/claude-3.5-sonnet/v-20250617", # available models: https://docs.thesys.dev/guides/models-pricing#model-table
     api_key=os.environ.get("THESYS_API_KEY")
 )
 
 # 2. Create SQL tool
-@tool
-def execute_sql_query(query: str) -> str:
+def run_sql_query(query: str) -> str:
     """Execute a SQL query on the Chinook database and return the results.
 
     Args:
         query: The SQL query to execute
 
     Returns:
-        The query results as a formatted string
+        The query results as a formatted string, truncated with a summary when large
     """
     try:
-        conn = sqlite3.connect('db/Chinook.db')
-        cursor = conn.cursor()
-        cursor.execute(query)
-        results = cursor.fetchall()
-
-        # Get column names
-        column_names = [description[0] for description in cursor.description]
-
-        # Format results
-        if not results:
-            return "No results found."
-
-        # Create a formatted table
-        formatted_results = []
-        formatted_results.append(" | ".join(column_names))
-        formatted_results.append("-" * len(" | ".join(column_names)))
-
-        for row in results:
-            formatted_results.append(" | ".join(str(value) for value in row))
-
-        conn.close()
-        return "\n".join(formatted_results)
+        engine = get_engine()
+        budgets = {
+            "max_rows": int(os.environ.get("SQL_TOOL_MAX_ROWS", "200")),
+            "max_bytes": int(os.environ.get("SQL_TOOL_MAX_BYTES", "16000")),
+        }
+        return get_query_cache(engine.db_path).get_or_compute(
+            query,
+            lambda: engine.execute_formatted(query, **budgets),
+            extra_key=tuple(budgets.values()),
+        )
 
     except Exception as e:
         return f"Error executing SQL query: {str(e)}"
 
+async def arun_sql_query(query: str) -> str:
+    """Runs the blocking SQLite query on a worker thread so the event loop stays free."""
+    return await asyncio.to_thread(run_sql_query, query)
+
+execute_sql_query = StructuredTool.from_function(
+    func=run_sql_query,
+    coroutine=arun_sql_query,
+    name="execute_sql_query",
+)
+
 # 3. Create parser
 parser = StrOutputParser()
 
@@ -86,7 +86,9 @@ Context from previous conversation:
 
 # 5. Create agent and chain
 tools = [execute_sql_query]
-agent = create_openai_tools_agent(model, tools, prompt)
+# Tags the agent's own model calls, so streaming can skip LLM calls made inside tools
+AGENT_MODEL_TAG = "agent_model"
+agent = create_openai_tools_agent(model.with_config(tags=[AGENT_MODEL_TAG]), tools, prompt)
 agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
 
 def format_inputs(inputs: ChainInput):
@@ -100,8 +102,47 @@ def format_inputs(inputs: ChainInput):
 
     return result["output"]
 
-# Create a proper runnable chain
-chain = RunnableLambda(format_inputs)
+async def aformat_inputs(inputs: ChainInput):
+    """Async counterpart of format_inputs: runs the agent natively on the event loop"""
+    context = inputs.get("c1Response", "No previous context")
+    result = await agent_executor.ainvoke({
+        "context": context,
+        "query": inputs["query"]
+    })
+
+    return result["output"]
+
+async def astream_agent(inputs: ChainInput, config: RunnableConfig = None):
+    """Streams the tokens of the agent's answer as they arrive.
+
+    Only the agent's own model calls are streamed, not LLM calls made inside
+    tools, and a model call stops streaming once it turns into a tool call.
+    """
+    context = inputs.get("c1Response", "No previous context")
+    tool_call_runs = set()
+    async for event in agent_executor.astream_events(
+        {"context": context, "query": inputs["query"]},
+        config=config,
+        version="v2",
+    ):
+        if event["event"] != "on_chat_model_stream" or AGENT_MODEL_TAG not in event.get("tags", []):
+            continue
+        chunk = event["data"]["chunk"]
+        if chunk.tool_call_chunks:
+            tool_call_runs.add(event["run_id"])
+        if chunk.content and event["run_id"] not in tool_call_runs:
+            yield chunk.content
+
+class AgentChain(RunnableLambda):
+    """invoke/ainvoke return the executor's output; astream (LangServe's /stream) streams its tokens."""
+
+    async def astream(self, input, config: RunnableConfig = None, **kwargs):
+        async for token in astream_agent(input, config):
+            yield token
+
+# Create a proper runnable chain. invoke and ainvoke (LangServe's /invoke) both
+# return the executor's final output, so sync and async calls agree.
+chain = AgentChain(format_inputs, afunc=aformat_inputs)
 
 # 6. App definition
 app = FastAPI(
@@ -117,6 +158,15 @@ add_routes(
     path="/chain",
 )
 
+@app.get("/sql/cache/stats")
+def sql_cache_stats():
+    """Returns hit/miss counters for the SQL result cache."""
+    return get_query_cache(get_engine().db_path).stats()
+
+@app.on_event("shutdown")
+def close_sql_engine():
+    get_engine().close()
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,108 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+# Splits SQL into alternating (code, quoted literal) parts so literals are left untouched
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(query: str) -> str:
+    """Normalizes SQL text for cache keys: case and whitespace outside literals, trailing semicolons."""
+    parts = _QUOTED.split(query.strip().rstrip(";").strip())
+    for i in range(0, len(parts), 2):
+        parts[i] = _WHITESPACE.sub(" ", parts[i]).lower()
+    return "".join(parts).strip()
+
+
+class QueryResultCache:
+    """Thread-safe LRU/TTL cache of formatted query results.
+
+    Entries are tagged with the database file version (mtime and size of the
+    database and its WAL file) and are dropped as soon as the file changes.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 512, ttl_seconds: float = 600.0):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _data_version(self) -> Tuple:
+        version = []
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                version.append(None)
+        return tuple(version)
+
+    def get_or_compute(self, query: str, compute: Callable[[], str], extra_key: Hashable = None) -> str:
+        """Returns the cached result for `query`, computing and storing it on a miss."""
+        key = (normalize_sql(query), extra_key)
+        version = self._data_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, entry_version, result = entry
+                if entry_version == version and expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+
+        result = compute()
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, version, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache: Optional[QueryResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache(db_path: str) -> QueryResultCache:
+    """Returns the process-wide result cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryResultCache(
+                    db_path=db_path,
+                    max_entries=int(os.environ.get("SQL_CACHE_MAX_ENTRIES", "512")),
+                    ttl_seconds=float(os.environ.get("SQL_CACHE_TTL_SECONDS", "600")),
+                )
+    return _cache
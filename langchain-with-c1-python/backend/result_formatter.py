@@ -0,0 +1,127 @@
+import sqlite3
+from typing import Any, List
+
+SEPARATOR = " | "
+
+
+class ColumnStats:
+    """Running statistics for one result column, kept in O(1) memory."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.numeric = 0
+        self.total = 0.0
+        self.min: Any = None
+        self.max: Any = None
+        self.max_length = 0
+
+    def add(self, value: Any) -> None:
+        self.count += 1
+        if value is None:
+            self.nulls += 1
+            return
+        if isinstance(value, (int, float)):
+            self.numeric += 1
+            self.total += value
+            self.min = value if self.min is None or value < self.min else self.min
+            self.max = value if self.max is None or value > self.max else self.max
+        else:
+            self.max_length = max(self.max_length, len(str(value)))
+
+    def describe(self) -> str:
+        parts = [f"{self.name}:"]
+        if self.nulls:
+            parts.append(f"nulls={self.nulls}")
+        if self.numeric and self.numeric == self.count - self.nulls:
+            mean = self.total / self.numeric
+            parts.append(f"min={self.min} max={self.max} mean={mean:.2f}")
+        elif self.count > self.nulls:
+            parts.append(f"text, max_length={self.max_length}")
+        return " ".join(parts)
+
+
+def format_query_results(
+    cursor: sqlite3.Cursor,
+    max_rows: int = 200,
+    max_bytes: int = 16_000,
+    batch_size: int = 100,
+    max_scan_rows: int = 100_000,
+) -> str:
+    """Formats an executed cursor as a pipe-delimited table within row and byte budgets.
+
+    Rows are pulled with `fetchmany` so only one batch is held in memory. Once a
+    budget is hit, remaining rows are only scanned (up to `max_scan_rows`) to
+    build a summary with the total row count and per-column statistics. The
+    returned text, summary included, never exceeds `max_bytes`.
+    """
+    column_names = [description[0] for description in cursor.description or []]
+    header = SEPARATOR.join(column_names)
+    lines: List[str] = [header, "-" * len(header)]
+    used_bytes = len(header.encode()) * 2 + 2
+    stats = [ColumnStats(name) for name in column_names]
+
+    shown = 0
+    scanned = 0
+    truncated = False
+    scan_capped = False
+    while not scan_capped:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        for row in batch:
+            scanned += 1
+            for column, value in zip(stats, row):
+                column.add(value)
+            if not truncated:
+                line = SEPARATOR.join(str(value) for value in row)
+                line_bytes = len(line.encode()) + 1
+                if shown < max_rows and used_bytes + line_bytes <= max_bytes:
+                    lines.append(line)
+                    used_bytes += line_bytes
+                    shown += 1
+                else:
+                    truncated = True
+            if scanned >= max_scan_rows:
+                scan_capped = True
+                break
+
+    if scan_capped and not truncated and cursor.fetchone() is not None:
+        truncated = True
+
+    if scanned == 0:
+        return "No results found."
+
+    if truncated:
+        total = f"at least {scanned}" if scan_capped else str(scanned)
+        # The summary counts against max_bytes too: drop shown rows from the end until it fits
+        summary = _summary(shown, total, stats)
+        while shown and used_bytes + _size(summary) > max_bytes:
+            used_bytes -= len(lines.pop().encode()) + 1
+            shown -= 1
+            summary = _summary(shown, total, stats)
+        lines.extend(summary)
+
+    return _clip("\n".join(lines), max_bytes)
+
+
+def _summary(shown: int, total: str, stats: List[ColumnStats]) -> List[str]:
+    return [
+        "",
+        f"[Truncated: showing {shown} of {total} rows. Add filters, aggregates or LIMIT to narrow the result.]",
+        "Column summary:",
+    ] + [f"- {column.describe()}" for column in stats]
+
+
+def _size(lines: List[str]) -> int:
+    """Bytes the lines add when joined onto a non-empty text with newlines."""
+    return sum(len(line.encode()) + 1 for line in lines)
+
+
+def _clip(text: str, max_bytes: int) -> str:
+    """Last resort when even the header or summary alone is over budget."""
+    encoded = text.encode()
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode(errors="ignore")
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+
+from result_formatter import format_query_results
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "db", "Chinook.db")
+
+
+class SQLQueryEngine:
+    """Read-only SQLite query engine with one pooled connection per thread.
+
+    Connections are opened once per worker thread in `mode=ro` (optionally
+    `immutable=1`) with mmap enabled, and reuse sqlite3's prepared-statement
+    cache, so repeated tool calls skip connection setup and page-cache warmup.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        immutable: bool = False,
+        mmap_size: int = 256 * 1024 * 1024,
+        cached_statements: int = 256,
+        timeout: float = 5.0,
+    ):
+        self.db_path = os.path.abspath(db_path)
+        self.immutable = immutable
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    @property
+    def uri(self) -> str:
+        uri = f"file:{self.db_path}?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+        return uri
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.uri,
+            uri=True,
+            timeout=self.timeout,
+            # Each connection is only used by its owning thread; this just lets close() run anywhere
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA query_only=1")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Returns the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def cursor(self) -> Iterator[sqlite3.Cursor]:
+        """Yields a cursor on the thread's connection and always closes it."""
+        cursor = self.connection().cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    def execute(self, query: str, params: Tuple[Any, ...] = ()) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """Executes a query and returns (column_names, rows)."""
+        with self.cursor() as cursor:
+            cursor.execute(query, params)
+            column_names = [description[0] for description in cursor.description or []]
+            return column_names, cursor.fetchall()
+
+    def execute_formatted(self, query: str, params: Tuple[Any, ...] = (), **budgets: int) -> str:
+        """Executes a query and streams the rows through the budgeted table formatter."""
+        with self.cursor() as cursor:
+            cursor.execute(query, params)
+            return format_query_results(cursor, **budgets)
+
+    def close(self) -> None:
+        """Closes every pooled connection."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+_engine: Optional[SQLQueryEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> SQLQueryEngine:
+    """Returns the process-wide query engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = SQLQueryEngine(
+                    db_path=os.environ.get("CHINOOK_DB_PATH", DEFAULT_DB_PATH),
+                    immutable=os.environ.get("CHINOOK_DB_IMMUTABLE", "0") == "1",
+                )
+    return _engine
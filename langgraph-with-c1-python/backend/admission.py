@@ -0,0 +1,173 @@
+# Vendored on purpose: each example is self-contained. Keep in sync with
+# google-adk/backend/admission.py, which differs only in reading its limits from config.py.
+# Limits are per process, so with several workers the effective caps are multiplied.
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import AsyncIterable, AsyncIterator, Deque, Dict, Optional, Tuple
+
+# Concurrent chat turns across all threads, and per thread (1 = one turn at a time)
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "64"))
+ADMISSION_MAX_PER_THREAD = int(os.getenv("ADMISSION_MAX_PER_THREAD", "1"))
+# Turns allowed to wait for a slot, and how long each may wait before a 503
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "128"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+
+
+class AdmissionRejected(Exception):
+    """Raised when a turn cannot be admitted; `retry_after` is a hint in whole seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """An admitted turn. Releasing it more than once is a no-op."""
+
+    def __init__(self, controller: "AdmissionController", thread_id: str):
+        self._controller = controller
+        self.thread_id = thread_id
+        self.admitted_at = time.monotonic()
+        self._released = False
+
+    async def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self)
+
+
+class AdmissionController:
+    """Caps concurrent chat turns globally and per thread.
+
+    Turns over the cap wait in a bounded FIFO queue; a turn is rejected right
+    away when the queue is full, or once it has waited `queue_timeout` seconds.
+    A waiter whose thread is busy doesn't block waiters for other threads.
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_per_thread: int = ADMISSION_MAX_PER_THREAD,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_thread = max_per_thread
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._per_thread: Dict[str, int] = {}
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "timeout": 0}
+        # Recent queue waits and turn durations, in seconds
+        self._waits: Deque[float] = deque(maxlen=1024)
+        self._holds: Deque[float] = deque(maxlen=256)
+
+    def _can_run(self, thread_id: str) -> bool:
+        return (
+            self.in_flight < self.max_concurrent
+            and self._per_thread.get(thread_id, 0) < self.max_per_thread
+        )
+
+    def _admit(self, thread_id: str) -> None:
+        self.in_flight += 1
+        self._per_thread[thread_id] = self._per_thread.get(thread_id, 0) + 1
+        self.admitted += 1
+
+    def _retry_after(self) -> int:
+        """Rough time until a slot frees up, from recent turn durations and the queue length."""
+        mean_hold = sum(self._holds) / len(self._holds) if self._holds else 1.0
+        return max(1, math.ceil(mean_hold * (len(self._waiters) + 1) / self.max_concurrent))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        return AdmissionRejected(reason, self._retry_after())
+
+    async def acquire(self, thread_id: str) -> Ticket:
+        """Waits for a slot for one turn on `thread_id`, or raises AdmissionRejected."""
+        # Queued turns keep their place: only jump the queue if none of them could take the slot
+        if self._can_run(thread_id) and not any(self._can_run(queued) for queued, _ in self._waiters):
+            self._admit(thread_id)
+            self._waits.append(0.0)
+            return Ticket(self, thread_id)
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (thread_id, waiter)
+        self._waiters.append(entry)
+        started = time.monotonic()
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # The client went away while queued; give back a slot granted in the meantime
+            if waiter.done():
+                self._release(Ticket(self, thread_id))
+            else:
+                waiter.cancel()
+                self._waiters.remove(entry)
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            self._waiters.remove(entry)
+            raise self._reject("timeout")
+        self._waits.append(time.monotonic() - started)
+        return Ticket(self, thread_id)
+
+    def _release(self, ticket: Ticket) -> None:
+        self.in_flight -= 1
+        remaining = self._per_thread.get(ticket.thread_id, 0) - 1
+        if remaining > 0:
+            self._per_thread[ticket.thread_id] = remaining
+        else:
+            self._per_thread.pop(ticket.thread_id, None)
+        self._holds.append(time.monotonic() - ticket.admitted_at)
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hands free slots to queued turns in arrival order."""
+        for entry in list(self._waiters):
+            if self.in_flight >= self.max_concurrent:
+                break
+            thread_id, waiter = entry
+            if self._can_run(thread_id):
+                self._waiters.remove(entry)
+                self._admit(thread_id)
+                waiter.set_result(None)
+
+    def stats(self) -> Dict[str, object]:
+        waits = sorted(self._waits)
+
+        def percentile_ms(pct: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(pct / 100 * len(waits)))] * 1000, 1)
+
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "busy_threads": len(self._per_thread),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "queue_wait_p50_ms": percentile_ms(50),
+            "queue_wait_p99_ms": percentile_ms(99),
+            "max_concurrent": self.max_concurrent,
+            "max_per_thread": self.max_per_thread,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+        }
+
+
+async def hold(ticket: Ticket, chunks: AsyncIterable[str]) -> AsyncIterator[str]:
+    """Streams `chunks`, releasing the ticket when the stream ends or is closed."""
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await ticket.release()
@@ -0,0 +1,113 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+# "memory" (bounded LRU, lost on restart) or "sqlite" (WAL-mode file on disk)
+CHECKPOINTER_BACKEND = os.getenv("CHECKPOINTER", "memory")
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "checkpoints.sqlite")
+CHECKPOINT_MAX_THREADS = int(os.getenv("CHECKPOINT_MAX_THREADS", "1000"))
+# "exit" writes one checkpoint per turn instead of one per graph step
+CHECKPOINT_DURABILITY = os.getenv("CHECKPOINT_DURABILITY", "exit")
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """In-memory checkpointer that keeps at most `max_threads` threads, evicting the least recently used."""
+
+    def __init__(self, max_threads: int = CHECKPOINT_MAX_THREADS, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._recent_lock = threading.Lock()
+
+    def _touch(self, thread_id: str) -> None:
+        evicted = []
+        with self._recent_lock:
+            self._recent[thread_id] = None
+            self._recent.move_to_end(thread_id)
+            while len(self._recent) > self.max_threads:
+                evicted.append(self._recent.popitem(last=False)[0])
+        for old_thread_id in evicted:
+            print(f"Evicting checkpoints for thread: {old_thread_id}")
+            super().delete_thread(old_thread_id)
+
+    # The async methods of InMemorySaver delegate to these, so both paths are bounded
+    def get_tuple(self, config):
+        checkpoint_tuple = super().get_tuple(config)
+        if checkpoint_tuple is not None:
+            self._touch(config["configurable"]["thread_id"])
+        return checkpoint_tuple
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        self._touch(config["configurable"]["thread_id"])
+        return next_config
+
+    async def alatest_checkpoint_id(self, thread_id: str) -> Optional[str]:
+        """Id of the thread's latest checkpoint, without loading it."""
+        checkpoints = self.storage.get(thread_id, {}).get("")
+        return max(checkpoints) if checkpoints else None
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._recent_lock:
+            self._recent.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+
+def _create_sqlite_saver(path: str) -> BaseCheckpointSaver:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    class WalSqliteSaver(AsyncSqliteSaver):
+        """AsyncSqliteSaver tuned for concurrent readers: WAL (set by setup), relaxed fsync and a busy timeout."""
+
+        async def setup(self) -> None:
+            first_setup = not self.is_setup
+            await super().setup()
+            if first_setup:
+                await self.conn.executescript(
+                    "PRAGMA synchronous=NORMAL; PRAGMA busy_timeout=5000; PRAGMA cache_size=-65536;"
+                )
+
+        async def alatest_checkpoint_id(self, thread_id: str) -> Optional[str]:
+            """Id of the thread's latest checkpoint, without loading it."""
+            await self.setup()
+            async with self.lock, self.conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id,),
+            ) as cur:
+                row = await cur.fetchone()
+            return row[0] if row else None
+
+    # The connection thread is started lazily by setup() on first use inside the event loop
+    return WalSqliteSaver(aiosqlite.connect(path, check_same_thread=False))
+
+
+def create_checkpointer(backend: Optional[str] = None) -> BaseCheckpointSaver:
+    """Creates the checkpointer selected by the CHECKPOINTER environment variable."""
+    backend = backend or CHECKPOINTER_BACKEND
+    if backend == "memory":
+        return BoundedMemorySaver()
+    if backend == "sqlite":
+        return _create_sqlite_saver(CHECKPOINT_DB_PATH)
+    raise ValueError(f"Unknown checkpointer backend: {backend}")
+
+
+async def latest_checkpoint_id(checkpointer: BaseCheckpointSaver, thread_id: str) -> Optional[str]:
+    """Id of the thread's latest checkpoint; it changes whenever the thread's state is written, by any worker."""
+    latest = getattr(checkpointer, "alatest_checkpoint_id", None)
+    if latest is not None:
+        return await latest(thread_id)
+    checkpoint_tuple = await checkpointer.aget_tuple({"configurable": {"thread_id": thread_id}})
+    return checkpoint_tuple.config["configurable"]["checkpoint_id"] if checkpoint_tuple else None
+
+
+async def close_checkpointer(checkpointer: BaseCheckpointSaver) -> None:
+    """Closes any connection held by the checkpointer."""
+    conn = getattr(checkpointer, "conn", None)
+    if conn is not None and hasattr(conn, "close"):
+        await conn.close()
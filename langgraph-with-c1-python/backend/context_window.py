@@ -0,0 +1,164 @@
+import os
+import re
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, SystemMessage, ToolMessage
+
+# Token budget for the messages sent to the model on each call, summary included
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "16000"))
+# Cap on the rolling summary of turns that no longer fit. It is a recency window:
+# one line per folded turn, oldest lines dropped first
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "1000"))
+# "tiktoken" counts with the o200k_base encoding (downloaded once if not cached);
+# "chars" estimates 4 characters per token, e.g. for offline deployments
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "tiktoken")
+# Folded turns the summary should hold; each line's snippets are sized to fit
+_SUMMARY_TARGET_TURNS = 20
+_SUMMARY_MIN_SNIPPET_CHARS = 40
+# Per-message overhead of the chat format (role, separators)
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """tiktoken's o200k_base encoding, or None when tiktoken or its data is unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded and CONTEXT_TOKENIZER == "tiktoken":
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception as e:
+                    print(f"tiktoken unavailable ({e!r}), estimating tokens from length")
+            _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part if isinstance(part, str) else str(part.get("text", "")) for part in content)
+    return str(content or "")
+
+
+def message_tokens(message: AnyMessage) -> int:
+    tokens = _MESSAGE_OVERHEAD_TOKENS + count_tokens(_text(message.content))
+    if isinstance(message, AIMessage):
+        for tool_call in message.tool_calls:
+            tokens += count_tokens(tool_call["name"]) + count_tokens(str(tool_call["args"]))
+    return tokens
+
+
+def _split_turns(messages: Sequence[AnyMessage]) -> List[List[AnyMessage]]:
+    """Groups messages into turns, each starting at a user message."""
+    turns: List[List[AnyMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _collapse(turn: List[AnyMessage]) -> List[AnyMessage]:
+    """Drops a finished turn's tool calls and results; its final answer already reflects them."""
+    return [
+        message for message in turn
+        if not isinstance(message, ToolMessage) and not (isinstance(message, AIMessage) and message.tool_calls)
+    ]
+
+
+def _snippet_chars(summary_max_tokens: int) -> int:
+    """Characters kept from each side of a folded turn, so the summary holds about _SUMMARY_TARGET_TURNS lines."""
+    # About 4 characters per token, split between the request and the answer
+    return max(_SUMMARY_MIN_SNIPPET_CHARS, summary_max_tokens * 4 // (2 * _SUMMARY_TARGET_TURNS))
+
+
+def _snippet(content, max_chars: int) -> str:
+    text = _SPACE.sub(" ", _TAG.sub(" ", _text(content))).strip()
+    if len(text) > max_chars:
+        text = text[:max_chars].rstrip() + "..."
+    return text
+
+
+def _summarize_turn(turn: List[AnyMessage], max_chars: int) -> str:
+    """One line per folded turn: the user's request and the start of the final answer."""
+    user = next((_snippet(m.content, max_chars) for m in turn if isinstance(m, HumanMessage)), "")
+    answer = next(
+        (_snippet(m.content, max_chars) for m in reversed(turn) if isinstance(m, AIMessage) and not m.tool_calls), ""
+    )
+    return f"- User: {user} / Assistant: {answer}"
+
+
+def _trim_summary(summary: str, max_tokens: int) -> str:
+    lines = summary.splitlines()
+    while lines and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def summary_message(summary: str) -> SystemMessage:
+    return SystemMessage(content=f"Summary of earlier turns in this conversation:\n{summary}")
+
+
+def build_context(
+    messages: Sequence[AnyMessage],
+    summary: str = "",
+    summary_boundary: Optional[str] = None,
+    max_tokens: int = CONTEXT_MAX_TOKENS,
+    summary_max_tokens: int = CONTEXT_SUMMARY_MAX_TOKENS,
+) -> Tuple[List[AnyMessage], str, Optional[str]]:
+    """Selects the messages to send to the model within `max_tokens`.
+
+    Only messages after `summary_boundary` (the id of the last message already
+    folded into `summary`) are considered, so the work per call is bounded by
+    the window, not the thread length. Earlier turns lose their tool calls and
+    results; if the window is still over budget, its oldest turns are folded
+    into the summary. The current turn is always sent in full.
+
+    The summary keeps one short line per folded turn, about the last
+    _SUMMARY_TARGET_TURNS of them; older lines are dropped. If the boundary
+    message is gone (e.g. it was replaced), the summary is rebuilt from the
+    start of the thread rather than repeating turns it already covers.
+
+    Returns the window, the updated summary and the updated boundary.
+    """
+    start = 0
+    if summary_boundary is not None:
+        for index in range(len(messages) - 1, -1, -1):
+            if messages[index].id == summary_boundary:
+                start = index + 1
+                break
+        else:
+            summary, summary_boundary = "", None
+
+    turns = _split_turns(messages[start:])
+    window = [_collapse(turn) for turn in turns[:-1]] + turns[-1:]
+    sizes = [sum(message_tokens(m) for m in turn) for turn in window]
+    summary_tokens = count_tokens(summary) if summary else 0
+
+    while len(window) > 1 and sum(sizes) + summary_tokens > max_tokens:
+        turn = turns.pop(0)
+        window.pop(0)
+        sizes.pop(0)
+        line = _summarize_turn(turn, _snippet_chars(summary_max_tokens))
+        summary = _trim_summary(f"{summary}\n{line}" if summary else line, summary_max_tokens)
+        summary_tokens = count_tokens(summary)
+        summary_boundary = turn[-1].id
+
+    return [message for turn in window for message in turn], summary, summary_boundary
@@ -1,39 +1,77 @@
+import asyncio
 import os
-from typing import Annotated, TypedDict, Literal
+import threading
+from typing import Annotated, Optional, TypedDict, Literal
 from langchain_core.messages import AnyMessage, AIMessage, HumanMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, StateGraph, START
-from langgraph.prebuilt import ToolNode
-from dotenv import load_dotenv
+from langgraph.graph.state import CompiledStateGraph
 from tools import runnable_tools
+from checkpointer import close_checkpointer, create_checkpointer
+from tool_executor import ParallelToolNode
+from context_window import build_context, count_tokens, summary_message
 from langgraph.graph.message import add_messages
 
-load_dotenv()
-
 class AgentState(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
     response_id: str
+    # Rolling summary of turns that no longer fit the context window, and the
+    # id of the last message folded into it; the messages themselves are kept
+    summary: str
+    summary_boundary: Optional[str]
+
+# The model, checkpointer and compiled graph are built on first use, so importing
+# this module (and main.py) stays cheap; see get_app() and warm_up()
+_model: Optional[Runnable] = None
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_app: Optional[CompiledStateGraph] = None
+_init_lock = threading.RLock()
 
-# Initialize model with TheSys endpoint
-model = ChatOpenAI(
-    model="c1/anthropic/claude-sonnet-4/v-20251130",
-    base_url="https://api.thesys.dev/v1/embed",
-    api_key=os.getenv("THESYS_API_KEY"),
-).bind_tools(runnable_tools)
+def get_model() -> Runnable:
+    """The Thesys chat model with the tools bound, created on first use."""
+    global _model
+    if _model is None:
+        with _init_lock:
+            if _model is None:
+                # Imported here: langchain_openai (with openai) is most of the backend's import time
+                from langchain_openai import ChatOpenAI
 
-# Use prebuilt ToolNode (handles tool execution automatically)
-tool_node = ToolNode(runnable_tools)
+                # Initialize model with TheSys endpoint
+                _model = ChatOpenAI(
+                    model="c1/anthropic/claude-sonnet-4/v-20251130",
+                    base_url=os.getenv("THESYS_BASE_URL", "https://api.thesys.dev/v1/embed"),
+                    api_key=os.getenv("THESYS_API_KEY"),
+                ).bind_tools(runnable_tools)
+    return _model
 
 async def call_model(state: AgentState) -> dict:
-    """Call the model and assign response_id to final AI responses."""
-    messages = state["messages"]
+    """Call the model and assign response_id to final AI responses.
+
+    Only a token-budgeted window of the thread is sent: older tool exchanges
+    are dropped and turns that don't fit are folded into a rolling summary.
+    """
+    summary = state.get("summary", "")
+    boundary = state.get("summary_boundary")
+    # Off the event loop: tokenizing (and loading the tokenizer once) is CPU/IO work
+    messages, new_summary, new_boundary = await asyncio.to_thread(
+        build_context, state["messages"], summary, boundary
+    )
+    if new_summary:
+        messages = [summary_message(new_summary)] + messages
+    # Normally built by warm_up(); otherwise off the event loop, as the import is slow
+    model = _model or await asyncio.to_thread(get_model)
     response = await model.ainvoke(messages)
     
     # Assign response_id to final responses (no tool calls)
     if isinstance(response, AIMessage) and not response.tool_calls:
         response.id = state["response_id"]
     
-    return {"messages": [response]}
+    update = {"messages": [response]}
+    if new_boundary != boundary:
+        update["summary"] = new_summary
+        update["summary_boundary"] = new_boundary
+    return update
 
 def should_continue(state: AgentState) -> Literal["tools", END]:
     """Route to tools if last message has tool calls."""
@@ -42,14 +80,65 @@ def should_continue(state: AgentState) -> Literal["tools", END]:
         return "tools"
     return END
 
-# Build the graph
-workflow = StateGraph(AgentState)
-workflow.add_node("agent", call_model)
-workflow.add_node("tools", tool_node)
+def build_graph(checkpointer: Optional[BaseCheckpointSaver] = None) -> CompiledStateGraph:
+    """Builds and compiles the agent graph."""
+    workflow = StateGraph(AgentState)
+    workflow.add_node("agent", call_model)
+    # Runs the tool calls of one AI message concurrently, with per-tool timeouts and limits
+    workflow.add_node("tools", ParallelToolNode(runnable_tools).run)
+
+    workflow.set_entry_point("agent")
+    workflow.add_conditional_edges("agent", should_continue, {"tools": "tools", END: END})
+    workflow.add_edge("tools", "agent")
+    return workflow.compile(checkpointer=checkpointer)
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """The checkpointer selected by the CHECKPOINTER environment variable, created on first use."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _init_lock:
+            if _checkpointer is None:
+                _checkpointer = create_checkpointer()
+    return _checkpointer
+
+def get_app() -> CompiledStateGraph:
+    """The graph compiled with the checkpointer so thread state persists across requests."""
+    global _app
+    if _app is None:
+        with _init_lock:
+            if _app is None:
+                _app = build_graph(get_checkpointer())
+    return _app
+
+async def warm_up() -> None:
+    """Builds the model and graph, loads the tokenizer, sets up the checkpointer and opens a connection to the model API."""
+    # On the event loop: async checkpointers (e.g. AsyncSqliteSaver) bind to the running loop
+    app = get_app()
+    # Only the slow imports and tokenizer load go to a thread
+    model = await asyncio.to_thread(get_model)
+    await asyncio.to_thread(count_tokens, "")
+    import openai  # already loaded by get_model()
+
+    setup = getattr(app.checkpointer, "setup", None)
+    if setup is not None:
+        await setup()
+    try:
+        # Any response will do: it leaves a pooled connection that the first turn reuses
+        await model.bound.root_async_client.with_options(max_retries=0, timeout=10.0).models.list()
+    except openai.APIStatusError:
+        pass
+    except openai.APIConnectionError as e:
+        print(f"Could not reach the model API during warm-up: {e!r}")
 
-workflow.set_entry_point("agent")
-workflow.add_conditional_edges("agent", should_continue, {"tools": "tools", END: END})
-workflow.add_edge("tools", "agent")
+async def close_app() -> None:
+    """Closes the checkpointer's connection, if one was created."""
+    if _checkpointer is not None:
+        await close_checkpointer(_checkpointer)
 
-# Compile the graph
-app = workflow.compile()
+def __getattr__(name: str):
+    # Keeps `graph:app` (langgraph.json) and `from graph import app` working lazily
+    if name == "app":
+        return get_app()
+    if name == "checkpointer":
+        return get_checkpointer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,21 @@
-from fastapi import FastAPI, HTTPException, Body
+from dotenv import load_dotenv
+
+# Before the local imports, which read their settings from the environment
+load_dotenv()
+
+from fastapi import FastAPI, HTTPException, Body, Query, Request, Response
 from pydantic import BaseModel
-from langchain_core.messages import HumanMessage
-from typing import AsyncIterable, List, Literal, TypedDict
+from langchain_core.messages import AIMessageChunk, HumanMessage
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterable, List, Literal, Optional, TypedDict
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from graph import app
+import graph
+from checkpointer import CHECKPOINT_DURABILITY
+from streaming import cancel_on_disconnect, frame
+from admission import AdmissionController, AdmissionRejected, hold
 import thread_service
 from thread_service import ThreadInfo, UIMessage
 
@@ -27,34 +38,120 @@ class UpdateThreadRequest(BaseModel):
 
 # --- FastAPI App Instance --- #
 fastapi_app = FastAPI(title="LangGraph Chat API", docs_url="/docs")
+admission = AdmissionController()
+# Builds the model, graph and thread store and opens their connections; started with the app
+_warm_up_task: Optional[asyncio.Task] = None
+
+async def _warm_up() -> None:
+    await asyncio.to_thread(thread_service.get_thread_store)
+    await graph.warm_up()
+
+def _ensure_warm_up() -> asyncio.Task:
+    """Starts warming up unless it is running or has succeeded; a failed warm-up is retried."""
+    global _warm_up_task
+    if _warm_up_task is None or (_warm_up_task.done() and _warm_up_task.exception() is not None):
+        _warm_up_task = asyncio.create_task(_warm_up())
+    return _warm_up_task
 
 # --- Core Chat Streaming Logic --- #
 async def stream_langgraph_events(thread_id: str, prompt: Prompt, responseId: str) -> AsyncIterable[str]:
-    """Streams LangGraph events, yielding final content chunks."""
+    """Streams the agent's message tokens using LangGraph's "messages" stream mode.
+
+    Only LLM token chunks are produced by this mode, so no chain/tool/node events
+    are built just to be discarded.
+    """
     config = {"configurable": {"thread_id": thread_id}}
     input_message = HumanMessage(content=prompt['content'], id=prompt['id'])
     graph_input = {"messages": [input_message], "response_id": responseId}
-
-    async for event in app.astream_events(graph_input, config=config, version="v1"):
-        kind = event["event"]
-        if kind == "on_chat_model_stream":
-            content = event["data"]["chunk"].content
-            if content:
-                yield content
+    # Text streamed so far for the model message currently being generated
+    partial_id, partial = None, []
+
+    try:
+        # aclosing stops the graph run (and its model request) if we are cancelled
+        async with aclosing(graph.get_app().astream(
+            graph_input, config=config, stream_mode="messages", durability=CHECKPOINT_DURABILITY
+        )) as events:
+            async for chunk, metadata in events:
+                if metadata.get("langgraph_node") == "agent" and isinstance(chunk, AIMessageChunk):
+                    if chunk.id != partial_id:
+                        partial_id, partial = chunk.id, []
+                    if chunk.content and isinstance(chunk.content, str):
+                        partial.append(chunk.content)
+                        yield chunk.content
+                else:
+                    # Tool results: the model message before them is complete
+                    partial_id, partial = None, []
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client disconnected: keep the thread consistent with what it saw.
+        # Shielded so a repeated cancellation can't interrupt the write.
+        await asyncio.shield(thread_service.record_cancelled_turn(
+            thread_id, input_message, responseId, "".join(partial)
+        ))
+        raise
+    except BaseException:
+        thread_service.invalidate_projection(thread_id)
+        raise
+    await thread_service.record_turn(thread_id)
 
 
 @fastapi_app.post("/chat")
-async def chat_endpoint(request: ChatRequest):
-    """Handles the chat request using LangGraph stream."""
+async def chat_endpoint(request: ChatRequest, http_request: Request):
+    """Handles the chat request using LangGraph stream.
+
+    Turns are admitted by the admission controller (one at a time per thread);
+    when it is saturated the request is rejected with 503 and Retry-After.
+    """
+    try:
+        ticket = await admission.acquire(request.threadId)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy ({e.reason}), retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    # The ticket is released when the stream finishes, or by the background task
+    # if the response ends before the stream is ever started
+    # Disconnects cancel the graph run instead of letting it finish unobserved
+    stream = frame(stream_langgraph_events(request.threadId, request.prompt, request.responseId))
     return StreamingResponse(
-        stream_langgraph_events(request.threadId, request.prompt, request.responseId),
+        hold(ticket, cancel_on_disconnect(stream, http_request.is_disconnected)),
         media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache, no-transform"},
+        background=BackgroundTask(ticket.release),
     )
 
+@fastapi_app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the model and graph are built and connected, 503 until then."""
+    task = _ensure_warm_up()
+    if not task.done():
+        raise HTTPException(status_code=503, detail="Warming up", headers={"Retry-After": "1"})
+    if task.exception() is not None:
+        raise HTTPException(status_code=503, detail=f"Warm-up failed: {task.exception()!r}")
+    return {"status": "ready"}
+
+@fastapi_app.get("/admission/stats")
+def admission_stats():
+    """Chat admission queue depth, wait times and rejections."""
+    return admission.stats()
+
 @fastapi_app.get("/threads", response_model=List[ThreadInfo])
-def get_threads():
-    """Returns a list of all threads (metadata only)."""
-    return thread_service.get_thread_list()
+def get_threads(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    """Returns a page of threads (metadata only), newest first.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        threads, next_cursor = thread_service.get_thread_list(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return threads
 
 @fastapi_app.post("/threads", response_model=ThreadInfo)
 def create_thread_endpoint(request: CreateThreadRequest):
@@ -62,19 +159,34 @@ def create_thread_endpoint(request: CreateThreadRequest):
     return thread_service.create_thread(title=request.title)
 
 @fastapi_app.get("/threads/{thread_id}/messages", response_model=List[UIMessage])
-async def get_messages_endpoint(thread_id: str):
-    """Returns formatted messages for a specific thread."""
-    messages = await thread_service.get_formatted_ui_messages(thread_id)
-    if not messages and thread_id not in thread_service._thread_metadata_store:
+async def get_messages_endpoint(
+    thread_id: str,
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+):
+    """Returns formatted messages for a specific thread.
+
+    Pass `after=<messageId>` to fetch only newer messages, and the ETag from a
+    previous response in If-None-Match to get a 304 when nothing changed.
+    """
+    messages, etag = await thread_service.get_ui_messages(thread_id, after=after)
+    if not messages and after is None and not thread_service.thread_exists(thread_id):
          raise HTTPException(status_code=404, detail="Thread metadata not found")
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return messages
 
 @fastapi_app.delete("/threads/{thread_id}", status_code=204)
-def delete_thread_endpoint(thread_id: str):
-    """Deletes a thread's metadata."""
+async def delete_thread_endpoint(thread_id: str):
+    """Deletes a thread's metadata and its checkpointed state."""
     deleted = thread_service.delete_thread(thread_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Thread metadata not found")
+    await graph.get_checkpointer().adelete_thread(thread_id)
+    # After the delete, so a concurrent read can't cache the old state again
+    thread_service.invalidate_projection(thread_id)
 
 @fastapi_app.put("/threads/{thread_id}", response_model=ThreadInfo)
 def update_thread_endpoint(thread_id: str, request: UpdateThreadRequest):
@@ -90,6 +202,15 @@ async def update_message_endpoint(thread_id: str, message: UIMessage = Body(...)
     await thread_service.update_message(thread_id, message)
     return {"message": "Message update acknowledged"}
 
+@fastapi_app.on_event("startup")
+async def startup():
+    # In the background, so the server accepts connections (and probes) right away
+    _ensure_warm_up()
+
+@fastapi_app.on_event("shutdown")
+async def shutdown():
+    await graph.close_app()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(fastapi_app, host="0.0.0.0", port=8000)
@@ -0,0 +1,122 @@
+# Vendored on purpose: each example is self-contained. The coalescing and
+# framing code is kept in sync with google-adk/backend/streaming.py, which
+# also turns ADK events into deltas and reads its settings from config.py.
+import asyncio
+import os
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, List, Optional
+
+# "text" streams raw text chunks (what C1Chat expects); "sse" frames each chunk as `data:` events
+STREAM_FORMAT = os.getenv("STREAM_FORMAT", "text")
+STREAM_COALESCE_MAX_CHARS = int(os.getenv("STREAM_COALESCE_MAX_CHARS", "256"))
+STREAM_COALESCE_MAX_DELAY_MS = float(os.getenv("STREAM_COALESCE_MAX_DELAY_MS", "40"))
+# How often an idle stream checks whether the client is still connected
+STREAM_DISCONNECT_POLL_MS = float(os.getenv("STREAM_DISCONNECT_POLL_MS", "500"))
+
+
+def sse_event(data: str, event: Optional[str] = None) -> str:
+    """Frames `data` as a single server-sent event, splitting multi-line payloads."""
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+async def coalesce(
+    chunks: AsyncIterable[str],
+    max_chars: int = STREAM_COALESCE_MAX_CHARS,
+    max_delay: float = STREAM_COALESCE_MAX_DELAY_MS / 1000,
+) -> AsyncIterator[str]:
+    """Merges small chunks, flushing when `max_chars` is buffered or `max_delay` has passed
+    since the first buffered chunk, even if the upstream is idle (e.g. during a tool call)."""
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    buffer: List[str] = []
+    size = 0
+    deadline = 0.0
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield "".join(buffer)
+                buffer, size = [], 0
+                continue
+
+            try:
+                chunk = pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+
+            if not buffer:
+                deadline = loop.time() + max_delay
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= max_chars:
+                yield "".join(buffer)
+                buffer, size = [], 0
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            # Let the cancelled step unwind before closing the generator it is running
+            await asyncio.wait({pending})
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def frame(chunks: AsyncIterable[str], stream_format: str = STREAM_FORMAT) -> AsyncIterator[str]:
+    """Coalesces text chunks and applies the configured wire format."""
+    async for chunk in coalesce(chunks):
+        yield sse_event(chunk) if stream_format == "sse" else chunk
+    if stream_format == "sse":
+        yield sse_event("[DONE]", event="done")
+
+
+async def cancel_on_disconnect(
+    chunks: AsyncIterable[str],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_interval: float = STREAM_DISCONNECT_POLL_MS / 1000,
+) -> AsyncIterator[str]:
+    """Passes `chunks` through, cancelling the upstream as soon as the client disconnects.
+
+    The upstream step runs as a task so disconnects are noticed while it is idle
+    (waiting on the model or a tool), not only on the next write. The client is
+    checked at most once per `poll_interval`.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    next_check = loop.time() + poll_interval
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=max(0.0, next_check - loop.time()))
+            if done:
+                try:
+                    chunk = pending.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    pending = None
+                yield chunk
+
+            if loop.time() >= next_check:
+                if await is_disconnected():
+                    print("Client disconnected, cancelling the response")
+                    break
+                next_check = loop.time() + poll_interval
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.wait({pending})
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -1,12 +1,17 @@
 import uuid
+import hashlib
 import json
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Dict, List, Literal, Optional, Sequence, TypedDict
+from typing import Dict, List, Literal, Optional, Sequence, Tuple, TypedDict
 
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage
 from pydantic import BaseModel, Field
 
-from graph import app
+from checkpointer import latest_checkpoint_id
+from graph import get_app, get_checkpointer
+from thread_store import ThreadStore
 
 
 class UIMessage(TypedDict):
@@ -14,7 +19,7 @@ class UIMessage(TypedDict):
     role: Literal["user", "assistant"]
     content: Optional[str]
 
-# Metadata for each thread (stored in memory)
+# Metadata for each thread
 class ThreadMetadata(BaseModel):
     title: str
     createdAt: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -25,55 +30,66 @@ class ThreadInfo(BaseModel):
     title: str
     createdAt: datetime
 
-# Stores metadata {thread_id: ThreadMetadata}
-_thread_metadata_store: Dict[str, ThreadMetadata] = {}
+# Durable metadata store shared by all workers, opened on first use
+_thread_store: Optional[ThreadStore] = None
+_thread_store_lock = threading.Lock()
+
+def get_thread_store() -> ThreadStore:
+    """The thread metadata store, created (with its SQLite file) on first use."""
+    global _thread_store
+    if _thread_store is None:
+        with _thread_store_lock:
+            if _thread_store is None:
+                _thread_store = ThreadStore()
+    return _thread_store
 
 def create_thread(title: str) -> ThreadInfo:
     """Creates a new thread with a unique ID and initial metadata."""
     thread_id = str(uuid.uuid4())
     metadata = ThreadMetadata(title=title)
-    _thread_metadata_store[thread_id] = metadata
-    print(f"In-memory thread created: {thread_id}, Title: {title}")
+    get_thread_store().create(thread_id, metadata.title, metadata.createdAt)
+    print(f"Thread created: {thread_id}, Title: {title}")
     return ThreadInfo(
         threadId=thread_id,
         title=metadata.title,
         createdAt=metadata.createdAt
     )
 
-def get_thread_list() -> List[ThreadInfo]:
-    """Retrieves a list of all threads, sorted by creation date descending."""
+def thread_exists(thread_id: str) -> bool:
+    """Returns True if metadata exists for the thread."""
+    return get_thread_store().exists(thread_id)
+
+def get_thread_list(limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[ThreadInfo], Optional[str]]:
+    """Retrieves a page of threads, sorted by creation date descending, and the cursor for the next page."""
+    rows, next_cursor = get_thread_store().list_page(limit, cursor)
     threads = [
-        ThreadInfo(threadId=tid, title=meta.title, createdAt=meta.createdAt)
-        for tid, meta in _thread_metadata_store.items()
+        ThreadInfo(threadId=tid, title=title, createdAt=created_at)
+        for tid, title, created_at in rows
     ]
-    threads.sort(key=lambda t: t.createdAt, reverse=True)
-    print(f"Fetched in-memory thread list: {len(threads)} threads")
-    return threads
+    print(f"Fetched thread list page: {len(threads)} threads")
+    return threads, next_cursor
 
 def delete_thread(thread_id: str) -> bool:
     """Deletes a thread's metadata. Returns True if deleted, False otherwise."""
-    if thread_id in _thread_metadata_store:
-        del _thread_metadata_store[thread_id]
-        print(f"In-memory thread metadata deleted: {thread_id}")
+    if get_thread_store().delete(thread_id):
+        print(f"Thread metadata deleted: {thread_id}")
         return True
     else:
-        print(f"Attempted to delete non-existent in-memory thread: {thread_id}")
+        print(f"Attempted to delete non-existent thread: {thread_id}")
         return False
 
 def update_thread(thread_id: str, title: str) -> Optional[ThreadInfo]:
     """Updates the title of a thread. Returns updated ThreadInfo or None if not found."""
-    metadata = _thread_metadata_store.get(thread_id)
-    if metadata:
-        metadata.title = title
-        _thread_metadata_store[thread_id] = metadata # Update the store
-        print(f"In-memory thread updated: {thread_id}, New Title: {title}")
+    if get_thread_store().update_title(thread_id, title):
+        tid, title, created_at = get_thread_store().get(thread_id)
+        print(f"Thread updated: {thread_id}, New Title: {title}")
         return ThreadInfo(
-            threadId=thread_id,
-            title=metadata.title,
-            createdAt=metadata.createdAt
+            threadId=tid,
+            title=title,
+            createdAt=created_at
         )
     else:
-        print(f"Attempted to update non-existent in-memory thread: {thread_id}")
+        print(f"Attempted to update non-existent thread: {thread_id}")
         return None
 
 def _format_message_content(content: any) -> Optional[str]:
@@ -84,30 +100,185 @@ def _format_message_content(content: any) -> Optional[str]:
         return json.dumps(content)
     return str(content) if content is not None else None
 
+def _is_ui_message(msg: BaseMessage) -> bool:
+    return isinstance(msg, HumanMessage) or (isinstance(msg, AIMessage) and not msg.tool_calls)
+
+def _to_ui_message(msg: BaseMessage) -> UIMessage:
+    return UIMessage(
+        id=msg.id,
+        role="user" if isinstance(msg, HumanMessage) else "assistant",
+        content=_format_message_content(msg.content),
+    )
+
+def _checkpoint_id(config: Optional[dict]) -> Optional[str]:
+    return config["configurable"].get("checkpoint_id") if config else None
+
+def _etag(checkpoint_id: Optional[str], after: Optional[str]) -> str:
+    """Weak ETag for one representation: the thread's checkpoint and the `after` cursor.
+
+    Checkpoint ids are unique across processes, so every worker issues the
+    same ETag for the same state.
+    """
+    tag = checkpoint_id or "empty"
+    if after is not None:
+        tag += "-" + hashlib.sha256(after.encode()).hexdigest()[:16]
+    return f'W/"{tag}"'
+
+class ThreadProjection:
+    """UI view of a thread's messages as of checkpoint `checkpoint_id`, kept up to date incrementally."""
+
+    def __init__(self, messages: List[UIMessage], checkpoint_id: Optional[str]):
+        self.messages: List[UIMessage] = []
+        self.positions: Dict[str, int] = {}
+        self.checkpoint_id = checkpoint_id
+        for message in messages:
+            self.append(message)
+
+    def append(self, message: UIMessage) -> None:
+        self.positions[message["id"]] = len(self.messages)
+        self.messages.append(message)
+
+    def after(self, message_id: Optional[str]) -> List[UIMessage]:
+        """Messages after `message_id`; the full list if the id is unknown."""
+        position = self.positions.get(message_id) if message_id else None
+        if position is None:
+            return list(self.messages)
+        return self.messages[position + 1:]
+
+# Cached projections {thread_id: ThreadProjection}, most recently used last
+_projections: "OrderedDict[str, ThreadProjection]" = OrderedDict()
+_PROJECTION_MAX_THREADS = 1000
+
+async def _load_state(thread_id: str):
+    config = {"configurable": {"thread_id": thread_id}}
+    return await get_app().aget_state(config)
+
+def _raw_messages(snapshot) -> Sequence[BaseMessage]:
+    return snapshot.values.get("messages", []) if snapshot else []
+
+async def _load_raw_messages(thread_id: str) -> Sequence[BaseMessage]:
+    return _raw_messages(await _load_state(thread_id))
+
+async def _get_projection(thread_id: str) -> ThreadProjection:
+    """The thread's projection, rebuilt if its state was written since it was cached.
+
+    Only the latest checkpoint id is read to check that, so a write by another
+    worker (shared checkpointer) is seen without loading the thread's state.
+    """
+    latest = await latest_checkpoint_id(get_checkpointer(), thread_id)
+    projection = _projections.get(thread_id)
+    if projection is None or projection.checkpoint_id != latest:
+        snapshot = await _load_state(thread_id)
+        projection = ThreadProjection(
+            [_to_ui_message(msg) for msg in _raw_messages(snapshot) if _is_ui_message(msg)],
+            _checkpoint_id(snapshot.config if snapshot else None),
+        )
+        _projections[thread_id] = projection
+        while len(_projections) > _PROJECTION_MAX_THREADS:
+            _projections.popitem(last=False)
+    _projections.move_to_end(thread_id)
+    return projection
+
+async def get_ui_messages(thread_id: str, after: Optional[str] = None) -> Tuple[List[UIMessage], str]:
+    """Returns the thread's UI messages (only those after `after` if given) and their ETag."""
+    projection = await _get_projection(thread_id)
+    return projection.after(after), _etag(projection.checkpoint_id, after)
+
 async def get_formatted_ui_messages(thread_id: str) -> List[UIMessage]:
     """Retrieves messages from LangGraph state and formats them for the UI."""
+    messages, _ = await get_ui_messages(thread_id)
+    return messages
+
+async def record_turn(thread_id: str) -> None:
+    """Appends the messages produced by the latest turn to a cached projection.
+
+    Only the tail of the state after the last projected message is formatted,
+    and only when the turn wrote a single checkpoint on top of the projected
+    one. Otherwise (per-step durability, or a write by another worker) the
+    projection is dropped. Threads without a cached projection are built
+    lazily on their next read.
+    """
+    projection = _projections.get(thread_id)
+    if projection is None:
+        return
+    snapshot = await _load_state(thread_id)
+    checkpoint_id = _checkpoint_id(snapshot.config)
+    if checkpoint_id == projection.checkpoint_id:
+        return
+    if _checkpoint_id(snapshot.parent_config) != projection.checkpoint_id:
+        invalidate_projection(thread_id)
+        return
+    new_messages: List[UIMessage] = []
+    for msg in reversed(_raw_messages(snapshot)):
+        if msg.id in projection.positions:
+            break
+        if _is_ui_message(msg):
+            new_messages.append(_to_ui_message(msg))
+    for message in reversed(new_messages):
+        projection.append(message)
+    projection.checkpoint_id = checkpoint_id
+
+async def record_cancelled_turn(
+    thread_id: str, prompt: HumanMessage, response_id: str, partial_text: str
+) -> None:
+    """Checkpoints a turn cut short by a client disconnect.
+
+    Writes whatever the interrupted run didn't: the user's message, error
+    results for tool calls left without one (so the next model call is valid),
+    and the partial answer the client saw, under the turn's response id.
+    """
     config = {"configurable": {"thread_id": thread_id}}
-    snapshot = await app.aget_state(config)
-    raw_messages: Sequence[BaseMessage] = snapshot.values.get("messages", []) if snapshot else []
-  
-
-    formatted_messages: List[UIMessage] = []
-    for i, msg in enumerate(raw_messages):
-        if isinstance(msg, HumanMessage) or (isinstance(msg, AIMessage) and not msg.tool_calls):
-            formatted_messages.append(UIMessage(
-                id=msg.id,
-                role="user" if isinstance(msg, HumanMessage) else "assistant",
-                content=_format_message_content(msg.content),
-            ))
-    return formatted_messages
+    messages = list(await _load_raw_messages(thread_id))
+    updates: List[BaseMessage] = []
+
+    turn_start = next((i for i, msg in enumerate(messages) if msg.id == prompt.id), None)
+    if turn_start is None:
+        updates.append(prompt)
+        turn = []
+    else:
+        turn = messages[turn_start + 1:]
+
+    answered = {msg.tool_call_id for msg in turn if isinstance(msg, ToolMessage)}
+    for msg in turn:
+        if isinstance(msg, AIMessage):
+            for tool_call in msg.tool_calls:
+                if tool_call["id"] not in answered:
+                    updates.append(ToolMessage(
+                        content="Error: cancelled because the client disconnected.",
+                        name=tool_call["name"],
+                        tool_call_id=tool_call["id"],
+                        status="error",
+                    ))
+    if partial_text and not any(msg.id == response_id for msg in turn):
+        updates.append(AIMessage(content=partial_text, id=response_id))
+
+    if updates:
+        # As the agent's output, so the graph routes to END rather than resuming
+        await get_app().aupdate_state(config, {"messages": updates}, as_node="agent")
+    await record_turn(thread_id)
+
+def invalidate_projection(thread_id: str) -> None:
+    """Drops the cached projection so it is rebuilt from state on the next read."""
+    _projections.pop(thread_id, None)
+
+def _to_langchain_message(message: UIMessage) -> BaseMessage:
+    message_class = HumanMessage if message["role"] == "user" else AIMessage
+    return message_class(id=message["id"], content=message.get("content") or "")
 
 async def update_message(thread_id: str, message: UIMessage) -> None:
-    """Updates a message in the LangGraph state."""
+    """Updates a single message in the LangGraph state by id."""
+    projection = await _get_projection(thread_id)
+    if message["id"] not in projection.positions:
+        # The projection may predate a turn that has not been recorded yet
+        invalidate_projection(thread_id)
+        projection = await _get_projection(thread_id)
+    if message["id"] not in projection.positions:
+        print(f"Attempted to update non-existent message: {message['id']}")
+        return
     config = {"configurable": {"thread_id": thread_id}}
-    snapshot = await app.aget_state(config)
-    raw_messages: Sequence[BaseMessage] = snapshot.values.get("messages", []) if snapshot else []
-    for i, msg in enumerate(raw_messages):
-        if msg.id == message["id"]:
-            print(f"Updating message: {msg}")
-            raw_messages[i] = message
-    app.update_state(config, {"messages": raw_messages})
+    print(f"Updating message: {message['id']}")
+    # add_messages replaces the existing message with the same id in place,
+    # so only the changed message is written
+    await get_app().aupdate_state(config, {"messages": [_to_langchain_message(message)]})
+    # The write is a new checkpoint; the projection is rebuilt from it on the next read
+    invalidate_projection(thread_id)
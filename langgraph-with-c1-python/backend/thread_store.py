@@ -0,0 +1,112 @@
+import base64
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+THREAD_DB_PATH = os.getenv("THREAD_DB_PATH", "threads.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_threads_created_at ON threads (created_at DESC, thread_id DESC);
+"""
+
+# (thread_id, title, created_at)
+ThreadRow = Tuple[str, str, datetime]
+
+
+def _encode_timestamp(value: datetime) -> str:
+    # Fixed-width UTC ISO strings sort lexically in time order
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def encode_cursor(created_at: str, thread_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at}|{thread_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, thread_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return created_at, thread_id
+
+
+class ThreadStore:
+    """SQLite-backed thread metadata store, safe to share across uvicorn workers.
+
+    Uses WAL mode with a busy timeout so concurrent workers can read while one
+    writes, and one connection per thread within each process.
+    """
+
+    def __init__(self, path: str = THREAD_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def create(self, thread_id: str, title: str, created_at: datetime) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO threads (thread_id, title, created_at) VALUES (?, ?, ?)",
+                (thread_id, title, _encode_timestamp(created_at)),
+            )
+
+    def get(self, thread_id: str) -> Optional[ThreadRow]:
+        row = self._connection().execute(
+            "SELECT thread_id, title, created_at FROM threads WHERE thread_id = ?", (thread_id,)
+        ).fetchone()
+        return (row[0], row[1], datetime.fromisoformat(row[2])) if row else None
+
+    def exists(self, thread_id: str) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM threads WHERE thread_id = ?", (thread_id,)
+        ).fetchone() is not None
+
+    def list_page(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[ThreadRow], Optional[str]]:
+        """Returns up to `limit` threads, newest first, and the cursor for the next page (or None)."""
+        if cursor:
+            created_at, thread_id = decode_cursor(cursor)
+            rows = self._connection().execute(
+                "SELECT thread_id, title, created_at FROM threads "
+                "WHERE (created_at, thread_id) < (?, ?) "
+                "ORDER BY created_at DESC, thread_id DESC LIMIT ?",
+                (created_at, thread_id, limit + 1),
+            ).fetchall()
+        else:
+            rows = self._connection().execute(
+                "SELECT thread_id, title, created_at FROM threads "
+                "ORDER BY created_at DESC, thread_id DESC LIMIT ?",
+                (limit + 1,),
+            ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][2], rows[-1][0])
+        return [(row[0], row[1], datetime.fromisoformat(row[2])) for row in rows], next_cursor
+
+    def update_title(self, thread_id: str, title: str) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute("UPDATE threads SET title = ? WHERE thread_id = ?", (title, thread_id))
+        return cursor.rowcount > 0
+
+    def delete(self, thread_id: str) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+        return cursor.rowcount > 0
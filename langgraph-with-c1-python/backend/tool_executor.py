@@ -0,0 +1,98 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "30"))
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "16"))
+TOOL_THREAD_POOL_SIZE = int(os.getenv("TOOL_THREAD_POOL_SIZE", "16"))
+
+
+class ParallelToolNode:
+    """Graph node that runs all tool calls from one AI message concurrently.
+
+    Async tools run on the event loop; sync tools are offloaded to a bounded
+    thread pool. Each tool has its own timeout and concurrency limit shared
+    across all in-flight requests, and failures come back to the model as error
+    ToolMessages instead of failing the run.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool],
+        timeouts: Optional[Dict[str, float]] = None,
+        max_concurrency: Optional[Dict[str, int]] = None,
+        default_timeout: float = TOOL_TIMEOUT_SECONDS,
+        default_max_concurrency: int = TOOL_MAX_CONCURRENCY,
+        thread_pool_size: int = TOOL_THREAD_POOL_SIZE,
+    ):
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.timeouts = timeouts or {}
+        self.max_concurrency = max_concurrency or {}
+        self.default_timeout = default_timeout
+        self.default_max_concurrency = default_max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=thread_pool_size, thread_name_prefix="tool")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency.get(name, self.default_max_concurrency))
+            self._semaphores[name] = semaphore
+        return semaphore
+
+    async def _invoke(self, tool: BaseTool, args: Dict[str, Any]) -> Any:
+        if getattr(tool, "coroutine", None) is not None:
+            return await tool.ainvoke(args)
+        # Copy the context so callbacks and tracing still see the current run
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, context.run, tool.invoke, args)
+
+    async def _run_tool_call(self, tool_call: Dict[str, Any]) -> ToolMessage:
+        name = tool_call["name"]
+        tool = self.tools_by_name.get(name)
+        if tool is None:
+            return ToolMessage(
+                content=f"Error: {name} is not a valid tool.",
+                name=name,
+                tool_call_id=tool_call["id"],
+                status="error",
+            )
+
+        timeout = self.timeouts.get(name, self.default_timeout)
+        async with self._semaphore(name):
+            try:
+                # A timed-out sync tool keeps its pool thread until it returns; the run moves on
+                result = await asyncio.wait_for(self._invoke(tool, tool_call["args"]), timeout)
+            except asyncio.TimeoutError:
+                print(f"Tool {name} timed out after {timeout}s")
+                return ToolMessage(
+                    content=f"Error: {name} timed out after {timeout} seconds.",
+                    name=name,
+                    tool_call_id=tool_call["id"],
+                    status="error",
+                )
+            except Exception as e:
+                print(f"Tool {name} failed: {e}")
+                return ToolMessage(
+                    content=f"Error: {repr(e)}",
+                    name=name,
+                    tool_call_id=tool_call["id"],
+                    status="error",
+                )
+
+        if isinstance(result, ToolMessage):
+            return result
+        return ToolMessage(content=str(result), name=name, tool_call_id=tool_call["id"])
+
+    async def run(self, state: Dict[str, Any]) -> Dict[str, List[ToolMessage]]:
+        """Executes the tool calls of the last AI message and returns their results in call order."""
+        last_message = state["messages"][-1]
+        tool_calls = last_message.tool_calls if isinstance(last_message, AIMessage) else []
+        results = await asyncio.gather(*(self._run_tool_call(tool_call) for tool_call in tool_calls))
+        return {"messages": list(results)}